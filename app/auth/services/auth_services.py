@@ -3,6 +3,7 @@ from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.auth.schemas.auth_schemas import Token, UserSchemaPost, CreateUserRequest
+from app.utils.executors import blocking_executors
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 import os
@@ -16,23 +17,35 @@ bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class AuthServices:
     @staticmethod
-    def authenticate_user(email: str, password: str, db: Session):
-        user = db.query(User).filter(User.email == email).first()
+    def get_user_by_email(email: str, db: Session):
+        return db.query(User).filter(User.email == email).first()
+
+    @staticmethod
+    async def authenticate_user(email: str, password: str, db: Session):
+        # Queries and bcrypt run off the event loop, a login must not block other requests
+        user = await blocking_executors.run_db(AuthServices.get_user_by_email, email, db)
         if not user:
             return None
-        if not bcrypt_context.verify(password, user.password):
+        if not await blocking_executors.run_cpu(bcrypt_context.verify, password, user.password):
             return None
         return user
 
+    @staticmethod
+    def save_user(user: User, db: Session):
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+
     @staticmethod
     async def sign_up(create_user_request: UserSchemaPost, db: Session):
-        existing_user = db.query(User).filter(
-            User.email == create_user_request.email).first()
+        existing_user = await blocking_executors.run_db(
+            AuthServices.get_user_by_email, create_user_request.email, db)
         if existing_user:
             raise HTTPException(status_code=400, detail="Email ya registrado.")
 
-        hashed_password = bcrypt_context.hash(
-            create_user_request.password.encode("utf-8"))
+        hashed_password = await blocking_executors.run_cpu(
+            bcrypt_context.hash, create_user_request.password.encode("utf-8"))
 
         new_user = User(
             fullname=create_user_request.fullname,
@@ -41,9 +54,7 @@ class AuthServices:
             profile_picture="",
             registered=True
         )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await blocking_executors.run_db(AuthServices.save_user, new_user, db)
 
         token = AuthServices.create_access_token(
             new_user.email, new_user.id, new_user.registered, timedelta(hours=1))
@@ -51,7 +62,7 @@ class AuthServices:
 
     @staticmethod
     async def sign_in(create_user_request: CreateUserRequest, db: Session):
-        user = AuthServices.authenticate_user(
+        user = await AuthServices.authenticate_user(
             create_user_request.email, create_user_request.password, db)
         if not user:
             raise HTTPException(
@@ -1,84 +1,155 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from app.chat.schemas.message_schema import MessageDemoRequest, MessageRequest, MessageTurnRequest
 from app.chat.services.chat_services import ChatService
-from app.config.db import get_db
+from app.config.db import get_db, get_read_db
+from app.utils.deadline import Deadline, DeadlineExceededError
+from app.utils.pagination import DEFAULT_PAGE_SIZE, InvalidCursorError
 
 chats = APIRouter()
 tag = "Chats"
 endpoint = "/chats"
 
+# Keep proxies from buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 
 @chats.post("/chats", summary="Create a new chat", tags=[tag])
-def create_chat(message_request: MessageRequest, db: Session = Depends(get_db)):
+async def create_chat(message_request: MessageRequest, response: Response, async_mode: bool = False,
+                      db: Session = Depends(get_db)):
     """
     Create a new chat with the provided entry.
+
+    With `async_mode=true` the chat is created by a background worker and a job is
+    returned right away; poll `GET /chats/jobs/{job_id}` for the resulting message.
     """
+    deadline = Deadline()
     try:
-        chat = ChatService.create_chat(message_request, db)
+        if async_mode:
+            job = await ChatService.enqueue_chat(message_request, db)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return {"success": True, "job": job}
+
+        chat = await ChatService.create_chat(message_request, db, deadline)
         return {"success": True, "chat": chat}
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@chats.get("/chats/jobs/{job_id}", summary="Get the status of a chat creation job", tags=[tag])
+def get_chat_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    Retrieve the status of the chat creation job with the given `job_id`, and its
+    message once completed.
+    """
+    job, chat = ChatService.get_chat_job(job_id, db)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Chat job not found")
+    return {"success": True, "job": job, "chat": chat}
+
+
 @chats.post("/chats/demo", summary="Create a new chat demo", tags=[tag])
-def create_chat(message_request: MessageDemoRequest):
+async def create_chat(message_request: MessageDemoRequest):
     """
     Create a new chat demo with the provided entry.
     """
+    deadline = Deadline()
     try:
-        chat = ChatService.create_chat_demo(message_request)
+        chat = await ChatService.create_chat_demo(message_request, deadline)
         return {"success": True, "chat": chat}
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @chats.post("/reply", summary="Post a reply to an existing chat", tags=[tag])
-def create_reply(turn_request: MessageTurnRequest, db: Session = Depends(get_db)):
+async def create_reply(turn_request: MessageTurnRequest, db: Session = Depends(get_db)):
     """
     Post a reply to an existing chat.
     """
+    deadline = Deadline()
     try:
-        reply = ChatService.create_reply(turn_request, db)
+        reply = await ChatService.create_reply(turn_request, db, deadline)
         return {"success": True, "reply": reply}
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@chats.post("/chats/stream", summary="Create a new chat, streaming its progress and answer", tags=[tag])
+async def stream_chat(message_request: MessageRequest):
+    """
+    Create a new chat with the provided entry, streamed as server-sent events:
+    `progress` for each pipeline stage, `answer` for each generated chunk and
+    `done` with the persisted message.
+    """
+    return StreamingResponse(ChatService.stream_chat(message_request, Deadline()),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@chats.post("/reply/stream", summary="Post a reply to an existing chat, streaming its progress and answer", tags=[tag])
+async def stream_reply(turn_request: MessageTurnRequest):
+    """
+    Post a reply to an existing chat, streamed as server-sent events:
+    `progress` for each pipeline stage, `answer` for each generated chunk and
+    `done` with the persisted message.
+    """
+    return StreamingResponse(ChatService.stream_reply(turn_request, Deadline()),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @chats.get("/{user_id}", summary="Get chats by user id", tags=[tag])
-def get_chats_by_user_id(user_id: int, db: Session = Depends(get_db)):
+def get_chats_by_user_id(user_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                         db: Session = Depends(get_read_db)):
     """
-    Retrieve chats for the given `user_id`.
+    Retrieve a page of the chats of the given `user_id`, most recently active first.
+
+    Pass the returned `next_cursor` as `cursor` to get the next page; it is `null` on the last one.
+    Responses are cached until the user posts a new message.
     """
     try:
         print(f"Fetching chats for user_id: {user_id}")
-        chats = ChatService.get_chats_by_user_id(user_id, db)
-        if not chats:
-            print("No chats found for this user.")
-            raise HTTPException(
-                status_code=404, detail="No chats found for this user")
-
-        return {"success": True, "chats": chats}
-
+        body = ChatService.get_chats_by_user_id(user_id, db, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error fetching chats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if body is None:
+        print("No chats found for this user.")
+        raise HTTPException(
+            status_code=404, detail="No chats found for this user")
+
+    return Response(content=body, media_type="application/json")
+
 
 @chats.get("/messages/{chat_id}", summary="Get messages by chat id", tags=[tag])
-def get_messages_by_chat_id(chat_id: str, db: Session = Depends(get_db)):
+def get_messages_by_chat_id(chat_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                            db: Session = Depends(get_read_db)):
     """
-    Retrieve messages for the given `chat_id`.
+    Retrieve a page of the messages of the given `chat_id`, oldest first.
+
+    Pass the returned `next_cursor` as `cursor` to get the next page; it is `null` on the last one.
     """
     try:
-        messages = ChatService.get_messages_by_chat_id(chat_id, db)
-        if not messages:
-            raise HTTPException(
-                status_code=404, detail="No messages found for this chat")
-
-        return {"success": True, "messages": messages}
-
+        body = ChatService.get_messages_by_chat_id(chat_id, db, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    if body is None:
+        raise HTTPException(
+            status_code=404, detail="No messages found for this chat")
+
+    return Response(content=body, media_type="application/json")
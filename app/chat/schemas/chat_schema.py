@@ -3,6 +3,7 @@ from typing import Optional
 from pydantic import BaseModel
 
 from app.enums.answer_type_enum import AnswerTypeEnum
+from app.enums.chat_job_status_enum import ChatJobStatusEnum
         
 class ChatResponse(BaseModel):
     chat_id: str
@@ -10,4 +11,15 @@ class ChatResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True 
+
+class ChatJobResponse(BaseModel):
+    id: str
+    status: ChatJobStatusEnum
+    error: Optional[str]
+    attempts: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True 
@@ -4,12 +4,14 @@ from pydantic import BaseModel
 
 from app.enums.answer_type_enum import AnswerTypeEnum
 from app.enums.message_tone_enum import MessageToneEnum
+from app.enums.source_mode_enum import SourceModeEnum
 
 class MessageRequest(BaseModel):
     user_id: int
     entry: str
     tone: MessageToneEnum
     answer_type: AnswerTypeEnum
+    source_mode: Optional[SourceModeEnum] = None
 
     class Config:
         orm_mode = True 
@@ -18,6 +20,7 @@ class MessageDemoRequest(BaseModel):
     entry: str
     tone: MessageToneEnum
     answer_type: AnswerTypeEnum
+    source_mode: Optional[SourceModeEnum] = None
 
     class Config:
         orm_mode = True 
@@ -28,6 +31,7 @@ class MessageTurnRequest(BaseModel):
     tone: MessageToneEnum
     answer_type: AnswerTypeEnum
     chat_id: str
+    source_mode: Optional[SourceModeEnum] = None
 
     class Config:
         orm_mode = True 
@@ -1,41 +1,103 @@
+import orjson
 import requests
+from fastapi.encoders import jsonable_encoder
 
-from app.chat.schemas.chat_schema import ChatResponse
+from app.chat.schemas.chat_schema import ChatJobResponse, ChatResponse
 from app.chat.schemas.message_schema import MessageDemoRequest, MessageRequest, MessageResponse, MessageTurnRequest
+from app.utils.chat_history_cache import chat_history_cache
+from app.utils.chat_job_queue import chat_job_queue
+from app.utils.deadline import Deadline
+from app.utils.pagination import page_size
+from app.utils.sse import format_sse
 from app.utils.vectara import VectaraClient
 
 from app.models.message import Message
 
+def serialize_response(body: dict) -> bytes:
+    return orjson.dumps(jsonable_encoder(body))
+
+
 class ChatService:
     
     @staticmethod
-    def create_chat(message_request: MessageRequest, db: requests.Session):
+    async def create_chat(message_request: MessageRequest, db: requests.Session, deadline: Deadline = None):
         vectara_client = VectaraClient()
-        chat = vectara_client.create_chat(message_request, db)
+        chat = await vectara_client.create_chat(message_request, db, deadline)
         return chat
     
     @staticmethod
-    def create_chat_demo(message_request: MessageDemoRequest):
+    async def enqueue_chat(message_request: MessageRequest, db: requests.Session):
+        job = await chat_job_queue.enqueue(message_request, db)
+        return ChatJobResponse.model_validate(job, from_attributes=True)
+
+    @staticmethod
+    def get_chat_job(job_id: str, db: requests.Session):
+        job = chat_job_queue.get_job(job_id, db)
+        if job is None:
+            return None, None
+        return ChatJobResponse.model_validate(job, from_attributes=True), job.message
+    
+    @staticmethod
+    async def create_chat_demo(message_request: MessageDemoRequest, deadline: Deadline = None):
         vectara_client = VectaraClient()
-        chat = vectara_client.create_chat_demo(message_request)
+        chat = await vectara_client.create_chat_demo(message_request, deadline)
         return chat
 
     @staticmethod
-    def create_reply(turn_request: MessageTurnRequest, db: requests.Session):
+    async def create_reply(turn_request: MessageTurnRequest, db: requests.Session, deadline: Deadline = None):
         vectara_client = VectaraClient()
-        reply = vectara_client.create_index_reply(turn_request, db)
+        reply = await vectara_client.create_index_reply(turn_request, db, deadline)
         return reply
 
-   
     @staticmethod
-    def get_chats_by_user_id(user_id: int, db: requests.Session):
+    async def stream_chat(message_request: MessageRequest, deadline: Deadline = None):
         vectara_client = VectaraClient()
-        chats = vectara_client.get_chats_by_user_id(user_id, db)
-        return chats
-        
+        try:
+            async for event, data in vectara_client.stream_chat(message_request, deadline):
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"message": "Failed to create chat", "details": str(e)})
+
     @staticmethod
-    def get_messages_by_chat_id(chat_id: str, db: requests.Session):
+    async def stream_reply(turn_request: MessageTurnRequest, deadline: Deadline = None):
         vectara_client = VectaraClient()
-        messages = vectara_client.get_messages_by_chat_id(chat_id, db)
-        return messages
+        try:
+            async for event, data in vectara_client.stream_reply(turn_request, deadline):
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"message": "Failed to create reply", "details": str(e)})
+   
+    @staticmethod
+    def get_chats_by_user_id(user_id: int, db: requests.Session, limit: int = None, cursor: str = None):
+        """
+        :return: The serialized response with a page of chats, None if the user has no chats.
+        """
+        limit = page_size(limit)
+
+        def load():
+            vectara_client = VectaraClient()
+            page = vectara_client.get_chats_by_user_id(user_id, db, limit, cursor)
+            if not page["chats"]:
+                return None, ()
+            return serialize_response({"success": True, **page}), [chat_history_cache.user_chats_tag(user_id)]
+
+        return chat_history_cache.read_through(chat_history_cache.chats_key(user_id, limit, cursor), load)
+        
+    @staticmethod
+    def get_messages_by_chat_id(chat_id: str, db: requests.Session, limit: int = None, cursor: str = None):
+        """
+        :return: The serialized response with a page of messages, None if the chat has no messages.
+        """
+        limit = page_size(limit)
+
+        def load():
+            vectara_client = VectaraClient()
+            page = vectara_client.get_messages_by_chat_id(chat_id, db, limit, cursor)
+            if not page["messages"]:
+                return None, ()
+            # Only the last page gets new messages, earlier ones never change
+            tags = [chat_history_cache.chat_tail_tag(chat_id)] if page["next_cursor"] is None else []
+            return serialize_response({"success": True, **page}), tags
+
+        return chat_history_cache.read_through(chat_history_cache.messages_key(chat_id, limit, cursor), load)
     
\ No newline at end of file
@@ -1,8 +1,9 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from app.utils.query_log import SlowQueryLog
 
 load_dotenv()
 
@@ -12,11 +13,55 @@ MYSQL_HOST = os.getenv('MYSQL_HOST')
 MYSQL_PORT = os.getenv('MYSQL_PORT')
 MYSQL_DATABASE = os.getenv('MYSQL_DATABASE')
 
+# Read replica, the primary is used for reads too when it is not configured
+MYSQL_REPLICA_HOST = os.getenv('MYSQL_REPLICA_HOST')
+MYSQL_REPLICA_PORT = os.getenv('MYSQL_REPLICA_PORT', MYSQL_PORT)
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+# Below MySQL wait_timeout, so the server never closes a pooled connection first
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+DB_ECHO = os.getenv('DB_ECHO', 'false').lower() == 'true'
+
 
 URL_DATABASE = f'mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DATABASE}'
+URL_READ_DATABASE = (
+    f'mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_REPLICA_HOST}:{MYSQL_REPLICA_PORT}/{MYSQL_DATABASE}'
+    if MYSQL_REPLICA_HOST else None
+)
+
+
+def _create_engine(url: str, name: str):
+    """
+    Creates a pooled engine whose slow queries are logged.
+    :param url: Database URL.
+    :param name: Name of the engine in the slow query log.
+    :return: Tuple with the engine and its slow query log.
+    """
+    db_engine = create_engine(
+        url,
+        echo=DB_ECHO,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    query_log = SlowQueryLog(name)
+    query_log.install(db_engine)
+    return db_engine, query_log
+
+
+engine, query_log = _create_engine(URL_DATABASE, "primary")
+if URL_READ_DATABASE:
+    read_engine, read_query_log = _create_engine(URL_READ_DATABASE, "replica")
+else:
+    read_engine, read_query_log = engine, None
 
-engine = create_engine(URL_DATABASE, echo=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 def get_db():
@@ -26,8 +71,55 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """
+    Session for read-only routes, bound to the read replica when one is configured.
+    Replication lag applies: routes reading what the same request just wrote must use get_db.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_db_stats():
+    engines = {"primary": (engine, query_log)}
+    if read_query_log is not None:
+        engines["replica"] = (read_engine, read_query_log)
+    return {
+        name: {
+            "pool": {
+                "size": db_engine.pool.size(),
+                "checked_out": db_engine.pool.checkedout(),
+                "overflow": db_engine.pool.overflow(),
+            },
+            "queries": db_query_log.stats(),
+        }
+        for name, (db_engine, db_query_log) in engines.items()
+    }
+
+def _add_missing_columns():
+    """
+    Adds the nullable columns declared after their table was created. Other columns
+    need a default for the existing rows and must be migrated by hand.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type} NULL"))
+
 def create_all_tables():
     try:
         Base.metadata.create_all(bind=engine)
+        # create_all skips existing tables, so add the columns and indexes declared after they were created
+        _add_missing_columns()
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
     except Exception as e:
         raise e
@@ -0,0 +1,40 @@
+import os
+
+from sqlalchemy import text
+
+from app.config.db import SessionLocal, create_all_tables, engine
+from app.models import chat, chat_job, chat_summary, message, subscription, topic_corpus, user  # noqa: F401
+from app.utils.chat_summaries import ChatSummaries
+
+MIGRATIONS_LOCK = os.getenv("MIGRATIONS_LOCK", "allia_migrations")
+MIGRATIONS_LOCK_TIMEOUT = int(os.getenv("MIGRATIONS_LOCK_TIMEOUT", 60))
+
+
+def run_migrations():
+    """
+    Creates the missing tables and indexes and backfills the chat summaries.
+    Holds a MySQL named lock while it runs, so the workers of a deployment starting at
+    the same time run it one after the other instead of racing on the same tables.
+    Every step skips what already exists, so the workers after the first do nothing.
+    Can also be run on its own, before starting the application:
+
+        python -m app.config.migrations
+    """
+    with engine.connect() as connection:
+        acquired = connection.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"),
+            {"name": MIGRATIONS_LOCK, "timeout": MIGRATIONS_LOCK_TIMEOUT}).scalar()
+        if acquired != 1:
+            raise RuntimeError(f"Timed out waiting for the migrations lock '{MIGRATIONS_LOCK}'")
+        try:
+            create_all_tables()
+            with SessionLocal() as db:
+                backfilled = ChatSummaries.backfill(db)
+            if backfilled:
+                print(f"Backfilled {backfilled} chat summaries")
+        finally:
+            connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": MIGRATIONS_LOCK})
+
+
+if __name__ == "__main__":
+    run_migrations()
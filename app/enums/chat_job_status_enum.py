@@ -0,0 +1,7 @@
+from enum import Enum
+
+class ChatJobStatusEnum(Enum):
+    Pending = "Pending"
+    Running = "Running"
+    Completed = "Completed"
+    Failed = "Failed"
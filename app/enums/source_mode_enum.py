@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class SourceModeEnum(Enum):
+    Full = "Full"
+    Snippets = "Snippets"
+    Hybrid = "Hybrid"
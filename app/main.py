@@ -1,17 +1,49 @@
 
 import os
 import uvicorn
-from app.config.db import SessionLocal, create_all_tables
+from contextlib import asynccontextmanager
+from app.config.migrations import run_migrations
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.router import routes
+from app.utils.chat_job_queue import chat_job_queue
+from app.utils.chat_persistence import message_writer
+from app.utils.corpus_pool import corpus_pool
+from app.utils.executors import blocking_executors
+from app.utils.http_clients import upstream_clients
+from app.utils.loop_monitor import loop_lag_monitor
+from app.utils.topic_corpus_registry import TopicCorpusRegistry
+
+# Deployments running `python -m app.config.migrations` beforehand can skip it
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() == "true"
 
 try:
-    create_all_tables()
+    if RUN_MIGRATIONS_ON_STARTUP:
+        run_migrations()
 except Exception as e:
     raise HTTPException(status_code=500, detail=f"Error al crear tablas: {e}")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await loop_lag_monitor.start()
+    await upstream_clients.startup()
+    await corpus_pool.start()
+    await TopicCorpusRegistry.start_sweeper()
+    await chat_job_queue.start()
+    try:
+        yield
+    finally:
+        await chat_job_queue.stop()
+        await message_writer.stop()
+        await TopicCorpusRegistry.stop_sweeper()
+        await corpus_pool.stop()
+        await upstream_clients.shutdown()
+        blocking_executors.shutdown()
+        await loop_lag_monitor.stop()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
 app.include_router(routes)
@@ -1,18 +1,22 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 from sqlalchemy import DateTime, Integer, String
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.config.db import Base
 
 if TYPE_CHECKING:
+    from app.models.chat_summary import ChatSummary
     from app.models.message import Message
 
 class Chat(Base):
     __tablename__ = 'chats'
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True, index=True)
-    corpus_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    corpus_key: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    # Shared topic corpus the chat answered its first turn from, still searched by its replies
+    source_corpus_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     created_at: Mapped[str] = mapped_column(DateTime, nullable=False)
 
     # Relationship
     messages: Mapped[list["Message"]] = relationship("Message", back_populates="chat")
+    summary: Mapped["ChatSummary"] = relationship("ChatSummary", back_populates="chat", uselist=False)
@@ -0,0 +1,27 @@
+from typing import TYPE_CHECKING, Optional
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import relationship, Mapped, mapped_column
+from app.config.db import Base
+from app.enums.chat_job_status_enum import ChatJobStatusEnum
+
+if TYPE_CHECKING:
+    from app.models.message import Message
+
+class ChatJob(Base):
+    __tablename__ = 'chat_jobs'
+    __table_args__ = (
+        Index("ix_chat_jobs_status_created_at", "status", "created_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, index=True)
+    status: Mapped[ChatJobStatusEnum] = mapped_column(Enum(ChatJobStatusEnum), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    message_id: Mapped[Optional[str]] = mapped_column(ForeignKey("messages.id"), nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    locked_until: Mapped[Optional[str]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[str] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[str] = mapped_column(DateTime, nullable=False)
+
+    # Relationships
+    message: Mapped[Optional["Message"]] = relationship("Message")
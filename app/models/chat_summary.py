@@ -0,0 +1,23 @@
+from typing import TYPE_CHECKING
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import relationship, Mapped, mapped_column
+from app.config.db import Base
+
+if TYPE_CHECKING:
+    from app.models.chat import Chat
+
+class ChatSummary(Base):
+    __tablename__ = 'chat_summaries'
+    __table_args__ = (
+        # The chat list of a user is a range scan of this index
+        Index("ix_chat_summaries_user_id_last_message_at", "user_id", "last_message_at", "chat_id"),
+    )
+
+    chat_id: Mapped[str] = mapped_column(ForeignKey("chats.id"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    last_message_at: Mapped[str] = mapped_column(DateTime, nullable=False)
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_answer_preview: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+
+    # Relationships
+    chat: Mapped["Chat"] = relationship("Chat", back_populates="summary")
@@ -1,5 +1,5 @@
 from typing import TYPE_CHECKING
-from sqlalchemy import DateTime, Enum, String, Text, ForeignKey
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, String, Text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.config.db import Base
 from app.enums.answer_type_enum import AnswerTypeEnum
@@ -11,6 +11,11 @@ if TYPE_CHECKING:
 
 class Message(Base):
     __tablename__ = 'messages'
+    __table_args__ = (
+        # Keyset pagination of the chats of a user and of the messages of a chat
+        Index("ix_messages_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_messages_chat_id_created_at", "chat_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String(255), primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)  
@@ -0,0 +1,15 @@
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.config.db import Base
+
+class TopicCorpus(Base):
+    __tablename__ = 'topic_corpora'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    topic_key: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    query: Mapped[str] = mapped_column(Text, nullable=False)
+    language: Mapped[str] = mapped_column(String(16), nullable=False)
+    corpus_key: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[str] = mapped_column(DateTime, nullable=False)
+    expires_at: Mapped[str] = mapped_column(DateTime, nullable=False, index=True)
@@ -0,0 +1,62 @@
+from fastapi import APIRouter
+
+from app.config.db import get_db_stats
+from app.utils.cache import get_cache_stats
+from app.utils.chat_persistence import message_writer
+from app.utils.corpus_pool import corpus_pool
+from app.utils.deadline import get_deadline_misses
+from app.utils.loop_monitor import loop_lag_monitor
+from app.utils.resilience import get_upstream_stats
+
+monitoring = APIRouter()
+tag = "Monitoring"
+endpoint = "/metrics"
+
+
+@monitoring.get(endpoint + "/caches", summary="Get cache counters", tags=[tag])
+def get_caches():
+    """
+    Retrieve the size and hit/miss counters of every application cache.
+    """
+    return {"success": True, "caches": get_cache_stats()}
+
+
+@monitoring.get(endpoint + "/corpus-pool", summary="Get corpus pool state", tags=[tag])
+def get_corpus_pool():
+    """
+    Retrieve the size and counters of the pre-provisioned Vectara corpus pool.
+    """
+    return {"success": True, "corpus_pool": corpus_pool.stats()}
+
+
+@monitoring.get(endpoint + "/database", summary="Get database pools", tags=[tag])
+def get_database():
+    """
+    Retrieve the connection pool usage and slow query counters of the primary and the read replica,
+    and the counters of the batched reply writes.
+    """
+    return {"success": True, "database": get_db_stats(), "message_writer": message_writer.stats()}
+
+
+@monitoring.get(endpoint + "/deadlines", summary="Get deadline misses", tags=[tag])
+def get_deadlines():
+    """
+    Retrieve how many times each pipeline stage missed its share of the request deadline.
+    """
+    return {"success": True, "deadline_misses": get_deadline_misses()}
+
+
+@monitoring.get(endpoint + "/event-loop", summary="Get event loop lag", tags=[tag])
+def get_event_loop():
+    """
+    Retrieve how often and for how long blocking work stalled the event loop.
+    """
+    return {"success": True, "event_loop": loop_lag_monitor.stats()}
+
+
+@monitoring.get(endpoint + "/upstreams", summary="Get upstream circuit breakers", tags=[tag])
+def get_upstreams():
+    """
+    Retrieve the circuit breaker state, retry budget and hedging counters of every upstream service.
+    """
+    return {"success": True, "upstreams": get_upstream_stats()}
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 
+from app.enums.source_mode_enum import SourceModeEnum
 from app.utils.webscrapping.bing_scraper import BingNewsWebScraper
 from app.utils.webscrapping.google_scraper import GoogleNewsWebScraper
 
@@ -9,14 +10,15 @@ endpoint = "/news"
 
 
 @news.get("/news/serpapi")
-async def fetch_serapi_news(query: str, language: str = "us", max_results: int = 10):
+async def fetch_serapi_news(query: str, language: str = "us", max_results: int = 10,
+                            mode: SourceModeEnum = SourceModeEnum.Full):
     try:
         google_scraper = GoogleNewsWebScraper()
-        concatenatedGoogle = google_scraper.get_news(query=query, language=language, max_results=max_results)
+        concatenatedGoogle = await google_scraper.get_news(query=query, language=language, max_results=max_results, mode=mode)
         print("Google News Articles: ", concatenatedGoogle)
         
         bing_scraper = BingNewsWebScraper()
-        concatenatedBing = bing_scraper.get_news(query=query, language=language, max_results=max_results)
+        concatenatedBing = await bing_scraper.get_news(query=query, language=language, max_results=max_results, mode=mode)
         print("Bing News Articles: ", concatenatedBing)
         
         return {"concatenated": concatenatedBing + concatenatedGoogle}
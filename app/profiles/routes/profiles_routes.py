@@ -4,6 +4,7 @@ from app.profiles.schemas.profiles_schemas import UpdateProfileRequest, UpdatePh
 from app.profiles.services.profiles_services import ProfileService
 from app.config.db import get_db
 from app.users.schemas.user_schemas import UserResponse
+from app.utils.executors import blocking_executors
 
 profiles = APIRouter()
 endpoint = "/profiles"
@@ -15,5 +16,5 @@ endpoint = "/profiles"
 
 @profiles.patch(endpoint + "/{user_id}/photo", response_model=UserResponse, tags=["Profiles"])
 async def update_profile_photo(user_id: int, update_data: UpdatePhotoRequest, db: Session = Depends(get_db)):
-    user = ProfileService.update_profile_photo(user_id, update_data, db)
+    user = await blocking_executors.run_db(ProfileService.update_profile_photo, user_id, update_data, db)
     return user  
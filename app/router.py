@@ -6,6 +6,7 @@ from app.news.routes.webscraping_routes import news
 from app.chat.routes.chat_routes import chats
 from app.users.routes.user_routes import users
 from app.profiles.routes.profiles_routes import profiles
+from app.monitoring.routes.monitoring_routes import monitoring
 
 from app.config.routes import prefix
 routes = APIRouter()
@@ -16,4 +17,5 @@ routes.include_router(auth, prefix= prefix, tags=["Auth"])
 routes.include_router(news, prefix= prefix, tags=["News"])
 routes.include_router(chats, prefix= prefix, tags=["Chats"])
 routes.include_router(users, prefix=prefix, tags=["Users"])
-routes.include_router(profiles, prefix= prefix, tags=["Profiles"])
\ No newline at end of file
+routes.include_router(profiles, prefix= prefix, tags=["Profiles"])
+routes.include_router(monitoring, prefix= prefix, tags=["Monitoring"])
\ No newline at end of file
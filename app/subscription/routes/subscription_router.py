@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisco
 from app.subscription.schemas.subscription_schema import SubscriptionRequest, SubscriptionResponse
 from app.subscription.services.subscription_service import SubscriptionService
 from sqlalchemy.orm import Session
-from app.config.db import get_db
+from app.config.db import get_db, get_read_db
 
 
 subscriptions = APIRouter()
@@ -11,7 +11,7 @@ tag = "Subsription"
 endpoint = "/subscriptions"
 
 @subscriptions.get("/subscriptions/user/{user_id}", response_model=SubscriptionResponse)
-def get_subscription_by_user_id(user_id: int, db: Session = Depends(get_db)):
+def get_subscription_by_user_id(user_id: int, db: Session = Depends(get_read_db)):
     try:
         return SubscriptionService.get_subscription_by_user_id(user_id, db)
     except ValueError as e:
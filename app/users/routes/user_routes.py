@@ -1,30 +1,27 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.models.user import User
+from app.users.services.user_services import UserService
 from app.users.schemas.user_schemas import UserResponse
-from app.config.db import get_db
+from app.config.db import get_db, get_read_db
+from app.utils.executors import blocking_executors
 
 users = APIRouter()
 
 # Endpoint para obtener todos los usuarios (requiere autenticación)
 @users.get("/users", response_model=list[UserResponse], tags=["Users"])
-async def get_all_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
+async def get_all_users(db: Session = Depends(get_read_db)):
+    users = await blocking_executors.run_db(UserService.get_all_users, db)
     return users
 
 @users.get("/users/{user_id}", response_model=UserResponse, tags=["Users"])
-async def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_user_by_id(user_id: int, db: Session = Depends(get_read_db)):
+    user = await blocking_executors.run_db(UserService.get_user_by_id, user_id, db)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
     return user
 
 @users.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Users"])
 async def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
-    db.delete(user)
-    db.commit()
+    await blocking_executors.run_db(UserService.delete_user, user_id, db)
     return None
@@ -0,0 +1,421 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+def json_size(value: Any) -> int:
+    """
+    Approximates the memory footprint of a JSON-compatible value by its encoded size.
+    """
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache bounded by bytes, with LRU eviction and a per-entry TTL.
+    """
+
+    def __init__(self, name: str, max_bytes: int, ttl: float, sizeof: Callable[[Any], int] = json_size):
+        """
+        :param name: Name of the cache, used in the metrics.
+        :param max_bytes: Maximum total size of the cached values.
+        :param ttl: Default time to live of an entry, in seconds.
+        :param sizeof: Function returning the size in bytes of a value.
+        """
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, _, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, size: Optional[int] = None):
+        size = self.sizeof(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[2] > time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class DiskCache:
+    """
+    SQLite-backed cache tier. Survives restarts and is shared by every worker process
+    pointing at the same file. Bounded by bytes with least-recently-used eviction.
+
+    The total size is kept in a meta table by triggers, so writes read one row instead
+    of summing the table. Reads only refresh the access time of an entry once it is
+    older than TOUCH_INTERVAL, so most hits do not write.
+    """
+
+    TOUCH_INTERVAL = float(os.getenv("DISK_CACHE_TOUCH_INTERVAL", 60))
+
+    def __init__(self, name: str, path: str, max_bytes: int, ttl: float):
+        """
+        :param name: Name of the cache, also the name of its table.
+        :param path: Path of the SQLite database file.
+        :param max_bytes: Maximum total size of the stored values.
+        :param ttl: Default time to live of an entry, in seconds.
+        """
+        self.name = name
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.name} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {self.name}_accessed_at ON {self.name} (accessed_at)")
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.name}_meta (id INTEGER PRIMARY KEY CHECK (id = 1), "
+                    "total_size INTEGER NOT NULL)")
+                # Tables created before the meta table start from their current size
+                connection.execute(
+                    f"INSERT OR IGNORE INTO {self.name}_meta (id, total_size) "
+                    f"SELECT 1, COALESCE(SUM(size), 0) FROM {self.name}")
+                connection.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {self.name}_size_insert AFTER INSERT ON {self.name} BEGIN "
+                    f"UPDATE {self.name}_meta SET total_size = total_size + new.size WHERE id = 1; END")
+                connection.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {self.name}_size_delete AFTER DELETE ON {self.name} BEGIN "
+                    f"UPDATE {self.name}_meta SET total_size = total_size - old.size WHERE id = 1; END")
+                connection.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {self.name}_size_update AFTER UPDATE OF size ON {self.name} BEGIN "
+                    f"UPDATE {self.name}_meta SET total_size = total_size + new.size - old.size WHERE id = 1; END")
+                connection.execute("COMMIT")
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                f"SELECT value, expires_at, accessed_at FROM {self.name} WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return default
+            if now - row[2] >= self.TOUCH_INTERVAL:
+                connection.execute(f"UPDATE {self.name} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            print(f"Error reading from disk cache {self.name}: {e}")
+            self.misses += 1
+            return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        encoded = json.dumps(value, default=str)
+        size = len(encoded.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            connection = self._connection()
+            # An upsert rather than INSERT OR REPLACE: replaced rows do not fire the delete trigger
+            connection.execute(
+                f"INSERT INTO {self.name} (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "expires_at = excluded.expires_at, accessed_at = excluded.accessed_at",
+                (key, encoded, size, now + (self.ttl if ttl is None else ttl), now))
+            self._evict(connection, now)
+        except sqlite3.Error as e:
+            print(f"Error writing to disk cache {self.name}: {e}")
+
+    def _total_size(self, connection: sqlite3.Connection) -> int:
+        return connection.execute(f"SELECT total_size FROM {self.name}_meta WHERE id = 1").fetchone()[0]
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        if self._total_size(connection) <= self.max_bytes:
+            return
+        # Expired entries go first, then the least recently used ones
+        connection.execute(f"DELETE FROM {self.name} WHERE expires_at <= ?", (now,))
+        total = self._total_size(connection)
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        rows = connection.execute(f"SELECT key, size FROM {self.name} ORDER BY accessed_at")
+        stale_keys = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            stale_keys.append((key,))
+            excess -= size
+        connection.executemany(f"DELETE FROM {self.name} WHERE key = ?", stale_keys)
+
+    def delete(self, key: str):
+        try:
+            self._connection().execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            print(f"Error deleting from disk cache {self.name}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            connection = self._connection()
+            entries = connection.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+            total = self._total_size(connection)
+        except sqlite3.Error:
+            entries, total = None, None
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TieredCache:
+    """
+    In-memory LRU cache in front of an optional on-disk tier. Disk hits are promoted
+    to memory so the next lookup in the same process skips SQLite.
+    """
+
+    def __init__(self, name: str, max_bytes: int, ttl: float,
+                 disk_path: Optional[str] = None, disk_max_bytes: Optional[int] = None):
+        """
+        :param name: Name of the cache, used in the metrics and as the disk table name.
+        :param max_bytes: Maximum size of the in-memory tier.
+        :param ttl: Time to live of an entry, in seconds.
+        :param disk_path: (Optional) SQLite file of the on-disk tier. The tier is disabled if not provided.
+        :param disk_max_bytes: (Optional) Maximum size of the on-disk tier. Defaults to ten times max_bytes.
+        """
+        self.name = name
+        self.memory = LRUCache(name, max_bytes, ttl)
+        self.disk = DiskCache(name, disk_path, disk_max_bytes or max_bytes * 10, ttl) if disk_path else None
+        register_cache(self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                return value
+        return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.memory.set(key, value, ttl=ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl=ttl)
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk is not None else None,
+        }
+
+
+class RedisCache:
+    """
+    Cache tier on a Redis-protocol server (Redis, Valkey, KeyDB...), shared by every
+    worker and every instance. Values are stored as bytes, so callers serialize them.
+    Keys can be tagged, and deleting a tag deletes every key set with it. Errors are
+    logged and treated as misses, so the server being down only disables the cache.
+    Needs the optional redis package.
+    """
+
+    SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.2))
+
+    def __init__(self, name: str, url: str, ttl: float):
+        """
+        :param name: Name of the cache, also the prefix of its keys.
+        :param url: URL of the server (e.g., redis://localhost:6379/0).
+        :param ttl: Default time to live of an entry, in seconds.
+        """
+        if redis is None:
+            raise RuntimeError("The redis package is required to use a Redis cache")
+        self.name = name
+        self.ttl = ttl
+        self.client = redis.Redis.from_url(url, socket_timeout=self.SOCKET_TIMEOUT,
+                                           socket_connect_timeout=self.SOCKET_TIMEOUT)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.name}:tag:{tag}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self.client.get(self._key(key))
+        except redis.RedisError as e:
+            print(f"Error reading from Redis cache {self.name}: {e}")
+            self.errors += 1
+            value = None
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        ttl_ms = int((self.ttl if ttl is None else ttl) * 1000)
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            pipeline.set(self._key(key), value, px=ttl_ms)
+            for tag in tags:
+                # The tag outlives its keys, so deleting it always reaches them
+                pipeline.sadd(self._tag_key(tag), key)
+                pipeline.pexpire(self._tag_key(tag), ttl_ms)
+            pipeline.execute()
+        except redis.RedisError as e:
+            print(f"Error writing to Redis cache {self.name}: {e}")
+            self.errors += 1
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self._key(key))
+        except redis.RedisError as e:
+            print(f"Error deleting from Redis cache {self.name}: {e}")
+            self.errors += 1
+
+    def delete_tag(self, tag: str):
+        try:
+            keys = self.client.smembers(self._tag_key(tag))
+            self.client.delete(self._tag_key(tag), *(self._key(key.decode()) for key in keys))
+        except redis.RedisError as e:
+            print(f"Error deleting tag from Redis cache {self.name}: {e}")
+            self.errors += 1
+
+    def set_flag(self, key: str, ttl: float):
+        try:
+            self.client.set(self._key(key), b"1", px=int(ttl * 1000))
+        except redis.RedisError as e:
+            print(f"Error writing to Redis cache {self.name}: {e}")
+            self.errors += 1
+
+    def has_flag(self, key: str) -> bool:
+        try:
+            return bool(self.client.exists(self._key(key)))
+        except redis.RedisError as e:
+            print(f"Error reading from Redis cache {self.name}: {e}")
+            self.errors += 1
+            # Assume the flag is set, so a stale value is not cached
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+        }
+
+
+_caches: Dict[str, Any] = {}
+
+
+def register_cache(cache):
+    """
+    Registers a cache so its counters are exposed by the metrics endpoint.
+    """
+    _caches[cache.name] = cache
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    :return: Counters of every registered cache, keyed by cache name.
+    """
+    return {name: cache.stats() for name, cache in _caches.items()}
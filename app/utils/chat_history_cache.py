@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.utils.cache import LRUCache, RedisCache, redis, register_cache
+
+
+class ChatHistoryCache:
+    """
+    Read-through cache of the chat list and chat messages responses. Values are the
+    serialized response bodies, so a hit skips the query and the serialization.
+
+    Every entry is tagged with what makes it stale: the chat list pages with their
+    user, and the last page of a chat (the one a new message lands on) with that chat.
+    Earlier message pages never change and are only dropped by the LRU or their TTL.
+    Writes invalidate their tags and, for WRITE_GUARD seconds, keep results read for
+    them from being cached, covering reads that started before the write and replica lag.
+
+    Entries live in process memory, which is only consistent with a single worker;
+    setting CHAT_HISTORY_REDIS_URL shares them through a Redis-protocol server instead.
+    """
+
+    TTL = float(os.getenv("CHAT_HISTORY_CACHE_TTL", 5 * 60))
+    MAX_BYTES = int(os.getenv("CHAT_HISTORY_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+    WRITE_GUARD = float(os.getenv("CHAT_HISTORY_CACHE_WRITE_GUARD", 2))
+    REDIS_URL = os.getenv("CHAT_HISTORY_REDIS_URL")
+    # Tags of entries evicted by the LRU are pruned every PRUNE_INTERVAL writes
+    PRUNE_INTERVAL = 1000
+
+    def __init__(self, name: str):
+        self.name = name
+        self.memory = None
+        self.redis = None
+        if self.REDIS_URL and redis is not None:
+            self.redis = RedisCache(name, self.REDIS_URL, self.TTL)
+        else:
+            if self.REDIS_URL:
+                print(f"CHAT_HISTORY_REDIS_URL is set but the redis package is missing, {name} stays in memory")
+            self.memory = LRUCache(name, self.MAX_BYTES, self.TTL, sizeof=len)
+        self._tags: Dict[str, Set[str]] = defaultdict(set)
+        self._written: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._sets = 0
+        self.invalidations = 0
+        self.skipped = 0
+        register_cache(self)
+
+    @staticmethod
+    def chats_key(user_id: int, limit: int, cursor: Optional[str]) -> str:
+        return f"chats:{user_id}:{limit}:{cursor or ''}"
+
+    @staticmethod
+    def messages_key(chat_id: str, limit: int, cursor: Optional[str]) -> str:
+        return f"messages:{chat_id}:{limit}:{cursor or ''}"
+
+    @staticmethod
+    def user_chats_tag(user_id: int) -> str:
+        return f"user:{user_id}:chats"
+
+    @staticmethod
+    def chat_tail_tag(chat_id: str) -> str:
+        return f"chat:{chat_id}:tail"
+
+    def get(self, key: str) -> Optional[bytes]:
+        if self.redis is not None:
+            return self.redis.get(key)
+        return self.memory.get(key)
+
+    def _recently_written(self, tags: Iterable[str]) -> bool:
+        if self.redis is not None:
+            return any(self.redis.has_flag(f"written:{tag}") for tag in tags)
+        now = time.monotonic()
+        with self._lock:
+            return any(self._written.get(tag, 0) > now for tag in tags)
+
+    def set(self, key: str, value: bytes, tags: Iterable[str] = ()):
+        tags = tuple(tags)
+        if self._recently_written(tags):
+            self.skipped += 1
+            return
+        if self.redis is not None:
+            self.redis.set(key, value, tags=tags)
+            return
+        self.memory.set(key, value)
+        with self._lock:
+            for tag in tags:
+                self._tags[tag].add(key)
+            self._sets += 1
+            if self._sets % self.PRUNE_INTERVAL == 0:
+                self._prune()
+
+    def _prune(self):
+        now = time.monotonic()
+        for tag in list(self._tags):
+            keys = {key for key in self._tags[tag] if key in self.memory}
+            if keys:
+                self._tags[tag] = keys
+            else:
+                del self._tags[tag]
+        for tag in [tag for tag, until in self._written.items() if until <= now]:
+            del self._written[tag]
+
+    def invalidate(self, *tags: str):
+        """
+        Drops every entry set with one of the tags.
+        """
+        self.invalidations += 1
+        if self.redis is not None:
+            for tag in tags:
+                self.redis.set_flag(f"written:{tag}", self.WRITE_GUARD)
+                self.redis.delete_tag(tag)
+            return
+        with self._lock:
+            for tag in tags:
+                self._written[tag] = time.monotonic() + self.WRITE_GUARD
+                keys = self._tags.pop(tag, ())
+                for key in keys:
+                    self.memory.delete(key)
+
+    def invalidate_message(self, user_id: int, chat_id: str):
+        """
+        Drops the entries a new message of a chat makes stale: every chat list page of
+        its user, as the chat moves to the top, and the last page of the chat.
+        """
+        self.invalidate(self.user_chats_tag(user_id), self.chat_tail_tag(chat_id))
+
+    def read_through(self, key: str, load: Callable[[], Tuple[Optional[bytes], Iterable[str]]]) -> Optional[bytes]:
+        """
+        :param key: Key of the entry.
+        :param load: Function returning the serialized value and its tags, or None for
+            a value that must not be cached (e.g., a not found result).
+        :return: The cached or loaded value.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        value, tags = load()
+        if value is not None:
+            self.set(key, value, tags)
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self.redis is not None else "memory",
+            "entries": self.redis.stats() if self.redis is not None else self.memory.stats(),
+            "invalidations": self.invalidations,
+            "skipped_after_write": self.skipped,
+        }
+
+
+chat_history_cache = ChatHistoryCache("chat_history")
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.chat.schemas.message_schema import MessageRequest
+from app.config.db import SessionLocal
+from app.utils.deadline import Deadline
+from app.enums.chat_job_status_enum import ChatJobStatusEnum
+from app.models.chat_job import ChatJob
+from app.models.message import Message
+from app.utils.chat_persistence import unit_of_work
+from app.utils.executors import blocking_executors
+
+
+class ChatJobQueue:
+    """
+    MySQL-backed queue running the chat creation pipeline in a bounded pool of
+    background workers. Jobs are leased while running, so jobs of a worker that
+    died or restarted are picked up again once their lease expires.
+    """
+
+    WORKERS = int(os.getenv("CHAT_JOB_WORKERS", 4))
+    POLL_INTERVAL = float(os.getenv("CHAT_JOB_POLL_INTERVAL", 1))
+    LEASE_SECONDS = float(os.getenv("CHAT_JOB_LEASE_SECONDS", 5 * 60))
+    MAX_ATTEMPTS = int(os.getenv("CHAT_JOB_MAX_ATTEMPTS", 3))
+    # Nobody is waiting on a job, but it must finish well before its lease expires
+    DEADLINE = float(os.getenv("CHAT_JOB_DEADLINE", 120))
+
+    def __init__(self):
+        self._workers = []
+        self._wakeup: asyncio.Event = None
+
+    def _create_job(self, message_request: MessageRequest, db: Session) -> ChatJob:
+        now = datetime.now()
+        job = ChatJob(
+            id=str(uuid.uuid4()),
+            status=ChatJobStatusEnum.Pending,
+            payload=message_request.model_dump_json(),
+            error=None,
+            attempts=0,
+            created_at=now,
+            updated_at=now
+        )
+        # Not expired on commit, so the route builds its response without querying again
+        with unit_of_work(db):
+            db.add(job)
+        return job
+
+    async def enqueue(self, message_request: MessageRequest, db: Session) -> ChatJob:
+        """
+        Persists a chat creation job and wakes up an idle worker.
+        :param message_request: The message request object.
+        :param db: The database session.
+        :return: The pending job.
+        """
+        job = await blocking_executors.run_db(self._create_job, message_request, db)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    @staticmethod
+    def get_job(job_id: str, db: Session) -> Optional[ChatJob]:
+        return db.query(ChatJob).filter(ChatJob.id == job_id).first()
+
+    def _claim_job(self) -> Optional[tuple]:
+        now = datetime.now()
+        with SessionLocal() as db:
+            job = (
+                db.query(ChatJob)
+                .filter(or_(
+                    ChatJob.status == ChatJobStatusEnum.Pending,
+                    and_(ChatJob.status == ChatJobStatusEnum.Running, ChatJob.locked_until < now)
+                ))
+                .order_by(ChatJob.created_at.asc())
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = ChatJobStatusEnum.Running
+            job.attempts += 1
+            job.locked_until = now + timedelta(seconds=self.LEASE_SECONDS)
+            job.updated_at = now
+            db.commit()
+            return job.id, job.payload, job.attempts
+
+    def _finish_job(self, job_id: str, attempts: int, message_id: str = None, error: str = None):
+        with SessionLocal() as db:
+            job = db.query(ChatJob).filter(ChatJob.id == job_id).first()
+            if message_id is not None:
+                job.status = ChatJobStatusEnum.Completed
+                job.message_id = message_id
+                job.error = None
+            elif attempts < self.MAX_ATTEMPTS:
+                job.status = ChatJobStatusEnum.Pending
+                job.error = error
+            else:
+                job.status = ChatJobStatusEnum.Failed
+                job.error = error
+            job.locked_until = None
+            job.updated_at = datetime.now()
+            db.commit()
+
+    async def _run_job(self, job_id: str, payload: str, attempts: int):
+        # Imported here to avoid a circular import, the Vectara client module imports the chat schemas
+        from app.utils.vectara import VectaraClient
+
+        message_request = MessageRequest.model_validate_json(payload)
+        try:
+            with SessionLocal() as db:
+                result = await VectaraClient().create_chat(message_request, db, Deadline(self.DEADLINE))
+                if isinstance(result, Message):
+                    await blocking_executors.run_db(self._finish_job, job_id, attempts, message_id=result.id)
+                    return
+            await blocking_executors.run_db(self._finish_job, job_id, attempts, error=str(result))
+        except Exception as e:
+            print(f"Error running chat job {job_id}: {e}")
+            await blocking_executors.run_db(self._finish_job, job_id, attempts, error=str(e))
+
+    async def _work(self):
+        while True:
+            try:
+                claimed = await blocking_executors.run_db(self._claim_job)
+            except Exception as e:
+                print(f"Error claiming chat job: {e}")
+                claimed = None
+
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(*claimed)
+
+    async def start(self):
+        """
+        Starts the worker pool. Called once from the application lifespan.
+        """
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.WORKERS)]
+
+    async def stop(self):
+        """
+        Stops the worker pool. Running jobs are picked up again once their lease expires.
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+chat_job_queue = ChatJobQueue()
@@ -0,0 +1,188 @@
+import asyncio
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config.db import SessionLocal
+from app.models.message import Message
+from app.utils.chat_history_cache import chat_history_cache
+from app.utils.chat_summaries import ChatSummaries
+from app.utils.executors import blocking_executors
+
+
+@contextmanager
+def unit_of_work(db: Session):
+    """
+    Commits everything added to the session inside the block in a single transaction,
+    or rolls it back if the block raises. Objects are not expired on commit: the values
+    they were built with are the stored ones, so reading them back would be a wasted
+    round trip.
+    :param db: The session to commit.
+    """
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.expire_on_commit = expire_on_commit
+
+
+class MessageWriter:
+    """
+    Saves the replies of existing chats. Under load, when at least HIGH_LOAD_CONCURRENCY
+    saves are in flight, replies are grouped for up to MAX_DELAY seconds and written
+    with one multi-row INSERT and one commit per batch. Callers still wait for the
+    commit of their batch, so an acknowledged reply is never lost.
+
+    Batching is disabled unless CHAT_WRITE_BEHIND is set, every reply is then saved
+    by its own request.
+    """
+
+    ENABLED = os.getenv("CHAT_WRITE_BEHIND", "false").lower() == "true"
+    HIGH_LOAD_CONCURRENCY = int(os.getenv("CHAT_WRITE_BEHIND_CONCURRENCY", 4))
+    MAX_BATCH = int(os.getenv("CHAT_WRITE_BEHIND_MAX_BATCH", 50))
+    MAX_DELAY = float(os.getenv("CHAT_WRITE_BEHIND_MAX_DELAY", 0.02))
+
+    def __init__(self):
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flushes = set()
+        self._inflight = 0
+        self.direct_writes = 0
+        self.batched_writes = 0
+        self.batches = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def build_reply(user_id: int, chat_id: str, entry: str, tone, answer_type, turn_id: str,
+                    answer: str) -> dict:
+        return {
+            "id": turn_id,
+            "user_id": user_id,
+            "chat_id": chat_id,
+            "entry": entry,
+            "answer": answer,
+            "tone": tone,
+            "answer_type": answer_type,
+            "created_at": datetime.now(),
+        }
+
+    @staticmethod
+    def write_reply(row: dict, db: Session = None) -> Message:
+        """
+        Saves a reply and updates its chat summary in one transaction.
+        :param row: Columns of the reply, from build_reply.
+        :param db: (Optional) Session to use. A new one is opened if not provided.
+        :return: The saved message.
+        """
+        if db is None:
+            with SessionLocal() as new_db:
+                return MessageWriter.write_reply(row, new_db)
+
+        with unit_of_work(db):
+            new_message = Message(**row)
+            db.add(new_message)
+            db.flush()
+            ChatSummaries.record_messages([new_message], db)
+        chat_history_cache.invalidate_message(row["user_id"], row["chat_id"])
+        return new_message
+
+    async def save_reply(self, row: dict, save_directly: Callable[[], Awaitable[Message]]) -> Message:
+        """
+        :param row: Columns of the reply, from build_reply.
+        :param save_directly: Coroutine function saving the reply on its own, used under low load.
+        :return: The saved message.
+        """
+        self._inflight += 1
+        try:
+            if not self.ENABLED or self._inflight < self.HIGH_LOAD_CONCURRENCY:
+                self.direct_writes += 1
+                return await save_directly()
+            future = asyncio.get_running_loop().create_future()
+            self._pending.append((row, future))
+            if len(self._pending) >= self.MAX_BATCH:
+                self._start_flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.MAX_DELAY, self._start_flush)
+            return await future
+        finally:
+            self._inflight -= 1
+
+    def _start_flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[dict, asyncio.Future]]):
+        rows = [row for row, _ in batch]
+        try:
+            messages = await blocking_executors.run_db(self._write_batch, rows)
+        except Exception as e:
+            # One bad row (e.g., a duplicated turn) fails the whole statement, save them one by one instead
+            print(f"Error writing a batch of {len(rows)} replies, saving them one by one: {e}")
+            self.fallbacks += 1
+            for row, future in batch:
+                try:
+                    message = await blocking_executors.run_db(self.write_reply, row)
+                except Exception as row_error:
+                    if not future.done():
+                        future.set_exception(row_error)
+                    continue
+                if not future.done():
+                    future.set_result(message)
+            return
+
+        self.batches += 1
+        self.batched_writes += len(batch)
+        for (_, future), message in zip(batch, messages):
+            if not future.done():
+                future.set_result(message)
+
+    @staticmethod
+    def _write_batch(rows: List[dict]) -> List[Message]:
+        with SessionLocal() as db:
+            with unit_of_work(db):
+                db.execute(insert(Message).values(rows))
+                rows_by_chat: Dict[str, List[dict]] = {}
+                for row in rows:
+                    rows_by_chat.setdefault(row["chat_id"], []).append(row)
+                for chat_rows in rows_by_chat.values():
+                    ChatSummaries.record_messages([Message(**row) for row in chat_rows], db)
+        for row in rows:
+            chat_history_cache.invalidate_message(row["user_id"], row["chat_id"])
+        return [Message(**row) for row in rows]
+
+    async def stop(self):
+        """
+        Writes the pending replies, waiting for the batches being written.
+        """
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.ENABLED,
+            "inflight": self._inflight,
+            "pending": len(self._pending),
+            "direct_writes": self.direct_writes,
+            "batched_writes": self.batched_writes,
+            "batches": self.batches,
+            "fallbacks": self.fallbacks,
+        }
+
+
+message_writer = MessageWriter()
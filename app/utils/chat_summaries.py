@@ -0,0 +1,105 @@
+import os
+from typing import List
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session, aliased
+
+from app.models.chat_summary import ChatSummary
+from app.models.message import Message
+
+PREVIEW_LENGTH = int(os.getenv("CHAT_SUMMARY_PREVIEW_LENGTH", 200))
+
+
+class ChatSummaries:
+    """
+    Maintains the chat_summaries table: one row per chat with its owner, the date of its
+    last message, its number of messages and a preview of the last answer. Rows are
+    written in the transaction that saves the message, so the chat list can read them
+    instead of aggregating the messages.
+    """
+
+    @staticmethod
+    def preview(answer: str) -> str:
+        answer = " ".join((answer or "").split())
+        if len(answer) <= PREVIEW_LENGTH:
+            return answer
+        return answer[:PREVIEW_LENGTH - 1].rstrip() + "…"
+
+    @staticmethod
+    def add_for_new_chat(message: Message, db: Session) -> ChatSummary:
+        """
+        Adds the summary of a chat created with its first message. Does not commit.
+        :param message: The first message of the chat.
+        :param db: The session saving the message.
+        :return: The pending summary.
+        """
+        summary = ChatSummary(
+            chat_id=message.chat_id,
+            user_id=message.user_id,
+            last_message_at=message.created_at,
+            message_count=1,
+            last_answer_preview=ChatSummaries.preview(message.answer),
+        )
+        db.add(summary)
+        return summary
+
+    @staticmethod
+    def record_messages(messages: List[Message], db: Session):
+        """
+        Updates the summary of a chat with new messages. Does not commit.
+        A single upsert, so concurrent replies to a chat without a summary do not race
+        to create it: the first one inserts the row, the others add to it.
+        :param messages: Messages added to the same chat, already flushed.
+        :param db: The session saving the messages.
+        """
+        latest = max(messages, key=lambda message: (message.created_at, message.id))
+        statement = mysql_insert(ChatSummary).values(
+            chat_id=latest.chat_id,
+            user_id=latest.user_id,
+            last_message_at=latest.created_at,
+            message_count=len(messages),
+            last_answer_preview=ChatSummaries.preview(latest.answer),
+        )
+        db.execute(statement.on_duplicate_key_update(
+            message_count=ChatSummary.message_count + len(messages),
+            last_message_at=statement.inserted.last_message_at,
+            last_answer_preview=statement.inserted.last_answer_preview,
+        ))
+
+    @staticmethod
+    def backfill(db: Session) -> int:
+        """
+        Creates the summaries of the chats that do not have one yet, in a single statement.
+        Safe to run again or from several processes: a summary created meanwhile by a reply
+        is replaced by the one counted from the messages.
+        :return: The number of summaries created or rebuilt.
+        """
+        latest = aliased(Message)
+        newer = aliased(Message)
+        counts = (
+            select(Message.chat_id, func.count().label("message_count"))
+            .where(~select(ChatSummary.chat_id).where(ChatSummary.chat_id == Message.chat_id).exists())
+            .group_by(Message.chat_id)
+            .subquery()
+        )
+        # Owner, date and answer of the latest message of each chat
+        rows = (
+            select(counts.c.chat_id, latest.user_id, latest.created_at, counts.c.message_count,
+                   func.substr(latest.answer, 1, PREVIEW_LENGTH))
+            .join(latest, latest.chat_id == counts.c.chat_id)
+            .where(~select(newer.id).where(
+                newer.chat_id == latest.chat_id,
+                tuple_(newer.created_at, newer.id) > tuple_(latest.created_at, latest.id),
+            ).exists())
+        )
+        statement = mysql_insert(ChatSummary).from_select(
+            ["chat_id", "user_id", "last_message_at", "message_count", "last_answer_preview"], rows)
+        result = db.execute(statement.on_duplicate_key_update(
+            user_id=statement.inserted.user_id,
+            last_message_at=statement.inserted.last_message_at,
+            message_count=statement.inserted.message_count,
+            last_answer_preview=statement.inserted.last_answer_preview,
+        ))
+        db.commit()
+        return result.rowcount
@@ -0,0 +1,132 @@
+import asyncio
+import os
+from typing import Any, Dict
+
+
+class CorpusPool:
+    """
+    Keeps a pool of empty, ready-to-use Vectara corpora so new chats do not wait for
+    POST /corpora. A background task refills the pool up to the high watermark whenever
+    it drops below the low watermark.
+    """
+
+    LOW_WATERMARK = int(os.getenv("CORPUS_POOL_LOW_WATERMARK", 2))
+    HIGH_WATERMARK = int(os.getenv("CORPUS_POOL_HIGH_WATERMARK", 5))
+    MAX_CONCURRENT_CREATIONS = int(os.getenv("CORPUS_POOL_MAX_CONCURRENT_CREATIONS", 2))
+    RETRY_DELAY = float(os.getenv("CORPUS_POOL_RETRY_DELAY", 5))
+
+    def __init__(self):
+        self._corpora: asyncio.Queue = None
+        self._refill_needed: asyncio.Event = None
+        self._refill_task: asyncio.Task = None
+        self.pool_hits = 0
+        self.pool_misses = 0
+        self.created = 0
+        self.failures = 0
+
+    async def _create_corpus(self) -> str:
+        # Imported here to avoid a circular import, the Vectara client uses the pool
+        from app.utils.vectara import VectaraClient
+        return await VectaraClient().create_corpus()
+
+    async def _delete_corpus(self, corpus_key: str) -> dict:
+        from app.utils.vectara import VectaraClient
+        return await VectaraClient().delete_corpus(corpus_key)
+
+    async def _refill(self):
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CREATIONS)
+
+        async def create():
+            async with semaphore:
+                corpus_key = await self._create_corpus()
+            self._corpora.put_nowait(corpus_key)
+            self.created += 1
+
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+
+            missing = self.HIGH_WATERMARK - self._corpora.qsize()
+            if missing <= 0:
+                continue
+            results = await asyncio.gather(*(create() for _ in range(missing)), return_exceptions=True)
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                self.failures += len(errors)
+                print(f"Failed to create {len(errors)} pooled corpora: {errors[0]}")
+                await asyncio.sleep(self.RETRY_DELAY)
+                self._request_refill()
+
+    def _request_refill(self):
+        if self._corpora.qsize() < self.LOW_WATERMARK:
+            self._refill_needed.set()
+
+    async def start(self):
+        """
+        Starts the background refill task. Called once from the application lifespan.
+        """
+        self._corpora = asyncio.Queue()
+        self._refill_needed = asyncio.Event()
+        self._refill_needed.set()
+        self._refill_task = asyncio.create_task(self._refill())
+
+    async def stop(self):
+        """
+        Stops the background refill task and deletes the spare corpora, which would
+        otherwise be left behind on every restart. Called once from the application
+        lifespan, before the upstream clients are closed.
+        """
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+            self._refill_task = None
+
+        if self._corpora is None:
+            return
+        corpus_keys = []
+        while not self._corpora.empty():
+            corpus_keys.append(self._corpora.get_nowait())
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CREATIONS)
+
+        async def delete(corpus_key: str):
+            async with semaphore:
+                result = await self._delete_corpus(corpus_key)
+            if result.get("status") == "error":
+                print(f"Failed to delete pooled corpus {corpus_key}: {result.get('details')}")
+
+        await asyncio.gather(*(delete(corpus_key) for corpus_key in corpus_keys))
+
+    async def acquire(self) -> str:
+        """
+        Takes a corpus from the pool, creating one on the spot only when the pool is empty.
+        :return: The key of a new, empty corpus.
+        """
+        if self._corpora is None:
+            self.pool_misses += 1
+            return await self._create_corpus()
+
+        try:
+            corpus_key = self._corpora.get_nowait()
+            self.pool_hits += 1
+        except asyncio.QueueEmpty:
+            self.pool_misses += 1
+            corpus_key = await self._create_corpus()
+        self._request_refill()
+        return corpus_key
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": self._corpora.qsize() if self._corpora is not None else 0,
+            "low_watermark": self.LOW_WATERMARK,
+            "high_watermark": self.HIGH_WATERMARK,
+            "pool_hits": self.pool_hits,
+            "pool_misses": self.pool_misses,
+            "created": self.created,
+            "failures": self.failures,
+        }
+
+
+corpus_pool = CorpusPool()
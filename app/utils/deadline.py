@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+REQUEST_DEADLINE = float(os.getenv("CHAT_REQUEST_DEADLINE", 30))
+
+
+class DeadlineExceededError(Exception):
+    """
+    Raised when a stage that cannot be skipped does not finish within its share of the deadline.
+    """
+
+
+class Deadline:
+    """
+    Point in time by which a request must be answered. Created at the route and passed
+    down to every upstream call, each of them getting a share of the time left.
+    """
+
+    def __init__(self, seconds: float = None):
+        """
+        :param seconds: (Optional) Time budget of the request. Defaults to CHAT_REQUEST_DEADLINE.
+        """
+        self.seconds = REQUEST_DEADLINE if seconds is None else seconds
+        self.expires_at = time.monotonic() + self.seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, share: float = 1.0, minimum: float = 0.0) -> float:
+        """
+        Seconds a call may take.
+        :param share: Fraction of the remaining time given to the call.
+        :param minimum: Floor for calls worth attempting even when the budget is spent.
+        :return: The timeout, in seconds.
+        """
+        return max(minimum, self.remaining() * share)
+
+
+def timeout_options(deadline: Optional[Deadline], share: float = 1.0, minimum: float = 0.0) -> dict:
+    """
+    Keyword arguments bounding an httpx or Groq request by the deadline. Without a
+    deadline they are empty, so the client default timeout applies (passing
+    timeout=None would disable it instead).
+    """
+    if deadline is None:
+        return {}
+    return {"timeout": deadline.timeout(share, minimum)}
+
+
+_misses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+_misses_lock = threading.Lock()
+
+
+def record_deadline_miss(scope: str, stage: str):
+    """
+    Counts a stage that did not finish within its share of the request deadline.
+    :param scope: Name of the flow (e.g., the pipeline name).
+    :param stage: Name of the stage.
+    """
+    with _misses_lock:
+        _misses[scope][stage] += 1
+    print(f"Deadline missed by stage '{stage}' of '{scope}'")
+
+
+def get_deadline_misses() -> Dict[str, Dict[str, int]]:
+    with _misses_lock:
+        return {scope: dict(stages) for scope, stages in _misses.items()}
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", 4))
+# Bodies whose 64-bit SimHash fingerprints differ in at most this many bits are near-duplicates.
+# Unrelated texts differ in about 32 bits; news bodies are short, so edited copies of a story
+# (bylines, a changed sentence) still land well above the usual 3-bit web page threshold.
+MAX_HAMMING_DISTANCE = int(os.getenv("DEDUP_MAX_HAMMING_DISTANCE", 10))
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> int:
+    """
+    Computes the 64-bit SimHash fingerprint of a text over its word shingles.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    weights = [0] * 64
+    for shingle, count in Counter(shingles).items():
+        fingerprint = _hash64(shingle)
+        for bit in range(64):
+            weights[bit] += count if fingerprint >> bit & 1 else -count
+
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _normalize_paragraph(paragraph: str) -> str:
+    return " ".join(WORD_PATTERN.findall(paragraph.lower()))
+
+
+def _body_size(articles: List[dict]) -> int:
+    return sum(len((article.get("body") or "").encode("utf-8")) for article in articles)
+
+
+def deduplicate_articles(articles_by_source: Dict[str, List[dict]]) -> Tuple[Dict[str, List[dict]], dict]:
+    """
+    Drops articles whose body is a near-duplicate of another one (e.g., the same wire
+    story syndicated by several outlets), keeping the longest copy, and then strips
+    paragraphs repeated across the remaining articles, which are boilerplate.
+    :param articles_by_source: Lists of article dictionaries (header, body, link), keyed by source.
+    :return: The deduplicated lists, keyed by source, and a report with the bytes saved.
+    """
+    entries = [(source, article) for source, articles in articles_by_source.items() for article in articles]
+    original_bytes = _body_size([article for _, article in entries])
+
+    # Longest bodies first, so the most complete copy of a story is the one kept
+    kept, seen_links, fingerprints = [], set(), []
+    duplicates = 0
+    for source, article in sorted(entries, key=lambda entry: len(entry[1].get("body") or ""), reverse=True):
+        link = article.get("link")
+        fingerprint = simhash(article.get("body") or "")
+        if link in seen_links or any(hamming_distance(fingerprint, other) <= MAX_HAMMING_DISTANCE
+                                     for other in fingerprints):
+            duplicates += 1
+            continue
+        seen_links.add(link)
+        fingerprints.append(fingerprint)
+        kept.append((source, article))
+
+    paragraph_counts = Counter()
+    for _, article in kept:
+        paragraphs = {_normalize_paragraph(p) for p in (article.get("body") or "").split("\n")}
+        paragraph_counts.update(p for p in paragraphs if p)
+
+    boilerplate_paragraphs = 0
+    deduplicated = {source: [] for source in articles_by_source}
+    kept_ids = {id(article) for _, article in kept}
+    for source, article in entries:
+        if id(article) not in kept_ids:
+            continue
+        paragraphs = []
+        for paragraph in (article.get("body") or "").split("\n"):
+            if paragraph_counts[_normalize_paragraph(paragraph)] > 1:
+                boilerplate_paragraphs += 1
+                continue
+            paragraphs.append(paragraph)
+        deduplicated[source].append({**article, "body": "\n".join(paragraphs)})
+
+    deduplicated_bytes = _body_size([article for articles in deduplicated.values() for article in articles])
+    report = {
+        "articles": len(entries),
+        "duplicate_articles": duplicates,
+        "boilerplate_paragraphs": boilerplate_paragraphs,
+        "original_bytes": original_bytes,
+        "deduplicated_bytes": deduplicated_bytes,
+        "bytes_saved": original_bytes - deduplicated_bytes,
+    }
+    return deduplicated, report
@@ -0,0 +1,42 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from app.config.db import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+
+class BlockingExecutors:
+    """
+    Dedicated thread pools for the blocking work of async routes, so it never runs on
+    the event loop: one for synchronous database sessions, sized to the connection
+    pool so a query never waits for a thread while holding a connection (or the
+    opposite), and one for CPU-bound work such as bcrypt, which releases the GIL.
+    """
+
+    DB_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", DB_POOL_SIZE + DB_MAX_OVERFLOW))
+    CPU_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", os.cpu_count() or 2))
+
+    def __init__(self):
+        self.db = ThreadPoolExecutor(max_workers=self.DB_WORKERS, thread_name_prefix="db")
+        self.cpu = ThreadPoolExecutor(max_workers=self.CPU_WORKERS, thread_name_prefix="cpu")
+
+    async def run_db(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs a function using a database session in the database pool.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.db, partial(func, *args, **kwargs))
+
+    async def run_cpu(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs a CPU-bound function (e.g., password hashing) in the CPU pool.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.cpu, partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        self.db.shutdown(wait=True)
+        self.cpu.shutdown(wait=True)
+
+
+blocking_executors = BlockingExecutors()
@@ -1,31 +1,72 @@
 import os
-from dotenv import load_dotenv
-from groq import Groq
+import re
+import unicodedata
+from groq import AsyncGroq
+
+from app.utils.cache import LRUCache, register_cache
+from app.utils.deadline import Deadline, timeout_options
+from app.utils.http_clients import upstream_clients
+from app.utils.language_detection import detect_language as detect_language_offline
+from app.utils.resilience import get_upstream
+
+# Generated queries, keyed by the normalized user description
+query_cache = LRUCache(
+    "news_queries",
+    max_bytes=int(os.getenv("QUERY_CACHE_MAX_BYTES", 2 * 1024 * 1024)),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", 60 * 60)),
+)
+register_cache(query_cache)
+
+
+def normalize_description(text: str) -> str:
+    """
+    Folds case, punctuation and whitespace so near-identical descriptions share a cache entry.
+    """
+    text = unicodedata.normalize("NFC", text or "").casefold()
+    text = "".join(" " if unicodedata.category(character).startswith("P") else character for character in text)
+    return re.sub(r"\s+", " ", text).strip()
+
 
 class GroqClient:
     """
     A class to encapsulate Groq client operations for language detection and query generation.
     """
 
-    def __init__(self, api_key: str = None):
+    def __init__(self, client: AsyncGroq = None):
         """
         Initialize the Groq client.
-        :param api_key: API key for Groq. If not provided, it will be loaded from environment variables.
+        :param client: Async Groq SDK client. If not provided, the shared client created at startup is used.
         """
-        load_dotenv()  # Load environment variables
-        self.api_key = api_key or os.getenv("GROQ_API_KEY")
-        if not self.api_key:
-            raise ValueError("GROQ_API_KEY is required")
-        self.client = Groq(api_key=self.api_key)
+        self.client = client or upstream_clients.get_groq()
+        self.LANG_DETECT_MIN_CONFIDENCE = float(os.getenv("LANG_DETECT_MIN_CONFIDENCE", 0.5))
         self.LANG_DETECT_MODEL = "llama3-8b-8192"
         self.QUERY_GEN_MODEL = "llama-3.3-70b-versatile"
 
-    def detect_language(self, text: str) -> str:
+    async def _complete(self, deadline: Deadline = None, **params):
+        """
+        Requests a chat completion through the Groq circuit breaker. Completions have no
+        side effects, so they are retried on upstream failures within the retry budget.
+        :param deadline: (Optional) Deadline of the request, bounding each attempt.
+        :param params: Parameters of the completion.
+        :return: The completion.
+        """
+        return await get_upstream("groq").call(
+            "completions",
+            lambda: self.client.chat.completions.create(**params, **timeout_options(deadline)),
+            idempotent=True, deadline=deadline)
+
+    async def detect_language(self, text: str, deadline: Deadline = None) -> str:
         """
         Detects the language of the input text and returns its ISO 639-1 code.
         :param text: The input text.
+        :param deadline: (Optional) Deadline of the request, bounding the Groq call.
         :return: The language code (e.g., "EN" for English).
         """
+        # Only pay for a Groq round trip when the offline detector is unsure
+        language, confidence = detect_language_offline(text)
+        if confidence >= self.LANG_DETECT_MIN_CONFIDENCE:
+            return language
+
         messages = [
             {
                 "role": "system",
@@ -41,7 +82,8 @@ class GroqClient:
         ]
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self._complete(
+                deadline,
                 messages=messages,
                 model=self.LANG_DETECT_MODEL,
                 max_tokens=2,
@@ -53,13 +95,33 @@ class GroqClient:
             print(f"Error detecting language: {e}")
             return 'EN'
 
-    def generate_news_query(self, user_description: str) -> dict:
+    @staticmethod
+    def fallback_query(user_description: str, language: str = None) -> dict:
+        """
+        Builds a search query from the user description alone, for when Groq is unavailable.
+        :param user_description: Description of the news to generate the query.
+        :param language: (Optional) Language of the description. Detected offline if not provided.
+        :return: A dictionary with the query and language.
+        """
+        return {
+            # First ten words, not characters
+            "query": ' '.join([word for word in user_description.split() if len(word) > 2][:10]),
+            "language": language or detect_language_offline(user_description)[0]
+        }
+
+    async def generate_news_query(self, user_description: str, deadline: Deadline = None) -> dict:
         """
         Generates a concise search query for news based on user description.
         :param user_description: Description of the news to generate the query.
+        :param deadline: (Optional) Deadline of the request, bounding the Groq calls.
         :return: A dictionary with the query and detected language.
         """
-        language = self.detect_language(user_description)
+        cache_key = normalize_description(user_description)
+        cached = query_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+
+        language = await self.detect_language(user_description, deadline)
 
         messages = [
             {
@@ -91,7 +153,8 @@ class GroqClient:
         ]
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self._complete(
+                deadline,
                 messages=messages,
                 model=self.QUERY_GEN_MODEL,
                 max_tokens=50
@@ -99,9 +162,12 @@ class GroqClient:
             query = response.choices[0].message.content.strip()
         except Exception as e:
             print(f"Error generating query: {e}")
-            query = ' '.join(word for word in user_description.split() if len(word) > 2)[:10]
+            # Do not memoize the fallback query, the next request should retry Groq
+            return self.fallback_query(user_description, language)
 
-        return {
+        query_data = {
             "query": query,
             "language": language
-        }
\ No newline at end of file
+        }
+        query_cache.set(cache_key, query_data)
+        return dict(query_data)
\ No newline at end of file
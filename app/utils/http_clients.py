@@ -0,0 +1,104 @@
+import os
+import httpx
+from dotenv import load_dotenv
+from groq import AsyncGroq
+
+load_dotenv()
+
+
+class UpstreamClients:
+    """
+    Long-lived, pooled keep-alive connections to every upstream host (Vectara, SerpAPI,
+    Groq and the news sites). Created once at application startup and shared by every request.
+    """
+
+    VECTARA_BASE_URL = "https://api.vectara.io/v2"
+    SERPAPI_BASE_URL = "https://serpapi.com"
+
+    MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 200))
+    MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", 50))
+    KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", 30))
+    CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", 5))
+    READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", 30))
+
+    def __init__(self):
+        self.vectara: httpx.AsyncClient = None
+        self.serpapi: httpx.AsyncClient = None
+        self.articles: httpx.AsyncClient = None
+        self.groq: AsyncGroq = None
+        self._groq_http: httpx.AsyncClient = None
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.MAX_CONNECTIONS,
+            max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=self.KEEPALIVE_EXPIRY,
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.READ_TIMEOUT, connect=self.CONNECT_TIMEOUT)
+
+    async def startup(self):
+        """
+        Opens the connection pools. Called once from the application lifespan.
+        """
+        vectara_api_key = os.getenv("VECTARA_API_KEY")
+        if not vectara_api_key:
+            raise ValueError("VECTARA_API_KEY is not set in the environment.")
+        groq_api_key = os.getenv("GROQ_API_KEY")
+        if not groq_api_key:
+            raise ValueError("GROQ_API_KEY is required")
+
+        self.vectara = httpx.AsyncClient(
+            base_url=self.VECTARA_BASE_URL,
+            headers={
+                'Content-Type': 'application/json',
+                'Accept': 'application/json',
+                'x-api-key': vectara_api_key
+            },
+            limits=self._limits(),
+            timeout=self._timeout(),
+        )
+        self.serpapi = httpx.AsyncClient(
+            base_url=self.SERPAPI_BASE_URL,
+            limits=self._limits(),
+            timeout=self._timeout(),
+        )
+        self.articles = httpx.AsyncClient(
+            headers={'User-Agent': 'Mozilla/5.0 (compatible; AlliaBot/1.0)'},
+            limits=self._limits(),
+            timeout=self._timeout(),
+            follow_redirects=True,
+        )
+        self._groq_http = httpx.AsyncClient(limits=self._limits(), timeout=self._timeout())
+        # Retries are handled by the resilience layer, within its retry budget
+        self.groq = AsyncGroq(api_key=groq_api_key, http_client=self._groq_http, max_retries=0)
+
+    async def shutdown(self):
+        """
+        Closes every connection pool. Called once from the application lifespan.
+        """
+        for client in (self.vectara, self.serpapi, self.articles, self._groq_http):
+            if client is not None:
+                await client.aclose()
+        self.vectara = self.serpapi = self.articles = self.groq = self._groq_http = None
+
+    def _require(self, client, name: str):
+        if client is None:
+            raise RuntimeError(f"The {name} client is not initialized, the application has not started up.")
+        return client
+
+    def get_vectara(self) -> httpx.AsyncClient:
+        return self._require(self.vectara, "Vectara")
+
+    def get_serpapi(self) -> httpx.AsyncClient:
+        return self._require(self.serpapi, "SerpAPI")
+
+    def get_articles(self) -> httpx.AsyncClient:
+        return self._require(self.articles, "article")
+
+    def get_groq(self) -> AsyncGroq:
+        return self._require(self.groq, "Groq")
+
+
+upstream_clients = UpstreamClients()
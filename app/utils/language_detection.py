@@ -0,0 +1,116 @@
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Tuple
+
+# Languages written in their own script are identified by character ranges
+SCRIPT_LANGUAGES = [
+    ("KO", re.compile(r"[가-힯ᄀ-ᇿ]")),
+    ("JA", re.compile(r"[぀-ヿ]")),
+    ("ZH", re.compile(r"[一-鿿]")),
+    ("AR", re.compile(r"[؀-ۿ]")),
+    ("HE", re.compile(r"[֐-׿]")),
+    ("RU", re.compile(r"[Ѐ-ӿ]")),
+    ("EL", re.compile(r"[Ͱ-Ͽ]")),
+    ("HI", re.compile(r"[ऀ-ॿ]")),
+    ("TH", re.compile(r"[฀-๿]")),
+]
+
+# Frequent function words of the Latin-script languages, the most reliable signal on short texts
+STOPWORDS = {
+    "EN": "the of and to in is that for on with as was by at from it be this are have has an "
+          "will about what who how why news latest after over new says said their they his her",
+    "ES": "el la de que y en los las del se por un una con para es al lo como más pero sus le "
+          "ha sobre este esta qué cómo noticias últimas según entre tras hoy",
+    "PT": "o a de que e do da em um uma para com não os as dos das no na se por mais ao pelo "
+          "pela como sobre foi são notícias últimas após hoje também",
+    "FR": "le la les de des du et en un une est que qui pour dans sur pas au aux ce cette avec "
+          "par plus sont il elle ont été nouvelles dernières après aujourd selon",
+    "DE": "der die das und in den von zu mit sich des auf für ist im dem nicht ein eine als auch "
+          "es an werden aus er hat dass sie nach wird bei über neue nachrichten heute",
+    "IT": "il di che e la per un in è non una sono del della con si le da al dei ha gli nel alla "
+          "più anche come ultime notizie dopo oggi sul sulla",
+    "NL": "de het een en van in is dat op te zijn voor met die niet aan er ook als bij om door "
+          "maar nieuws laatste na vandaag wordt heeft",
+}
+STOPWORDS = {language: set(words.split()) for language, words in STOPWORDS.items()}
+
+# Letters that only appear in some of the Latin-script languages
+DISTINCTIVE_CHARACTERS = {
+    "ES": "ñ¿¡",
+    "PT": "ãõ",
+    "FR": "èêëœ",
+    "DE": "äöüß",
+    "IT": "ìò",
+}
+
+# Word endings typical of a single Latin-script language
+DISTINCTIVE_SUFFIXES = {
+    "ES": ("ción", "ciones", "dad"),
+    "PT": ("ção", "ções", "dade"),
+    "FR": ("eux", "eaux", "ée"),
+    "DE": ("ung", "keit", "heit", "schaft"),
+    "IT": ("zione", "zioni", "ità"),
+    "NL": ("heid", "lijk", "ij"),
+    "EN": ("ing", "ly", "ship"),
+}
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def _detect_script(text: str) -> Tuple[str, float]:
+    letters = "".join(character for character in text if character.isalpha())
+    if not letters:
+        return None, 0.0
+
+    ratios = {language: len(pattern.findall(letters)) / len(letters) for language, pattern in SCRIPT_LANGUAGES}
+    # Japanese mixes kana with Han characters, so any meaningful amount of kana means Japanese
+    if ratios["JA"] >= 0.1:
+        return "JA", min(1.0, ratios["JA"] + ratios["ZH"])
+
+    language, ratio = max(ratios.items(), key=lambda item: item[1])
+    if ratio >= 0.3:
+        return language, min(1.0, ratio + 0.3)
+    return None, 0.0
+
+
+def _score_latin(text: str) -> Dict[str, float]:
+    lowered = text.lower()
+    words = WORD_PATTERN.findall(lowered)
+    counts = Counter(words)
+    scores = {language: 0.0 for language in STOPWORDS}
+
+    for language, stopwords in STOPWORDS.items():
+        scores[language] += sum(count for word, count in counts.items() if word in stopwords)
+
+    for language, suffixes in DISTINCTIVE_SUFFIXES.items():
+        scores[language] += sum(count for word, count in counts.items() if word.endswith(suffixes))
+
+    for language, characters in DISTINCTIVE_CHARACTERS.items():
+        scores[language] += 2 * sum(lowered.count(character) for character in characters)
+
+    return scores
+
+
+def detect_language(text: str) -> Tuple[str, float]:
+    """
+    Detects the language of a text without calling any external service.
+    :param text: The input text.
+    :return: Tuple with the ISO 639-1 code in upper case (e.g., "EN") and a confidence between 0 and 1.
+    """
+    text = unicodedata.normalize("NFC", text or "")
+
+    language, confidence = _detect_script(text)
+    if language:
+        return language, confidence
+
+    scores = _score_latin(text)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, second_score) = ranked[0], ranked[1]
+    if best_score == 0:
+        return "EN", 0.0
+
+    # Confidence grows with the margin over the runner-up and with the amount of evidence
+    margin = (best_score - second_score) / best_score
+    evidence = min(1.0, best_score / 4)
+    return best, round(margin * evidence, 3)
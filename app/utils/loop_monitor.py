@@ -0,0 +1,68 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Optional
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a task sleeping INTERVAL seconds. Any
+    delay means a callback blocked the loop; delays above THRESHOLD are logged and
+    counted. With LOOP_LAG_DEBUG, asyncio debug mode also logs the name of every
+    callback running longer than THRESHOLD, at the cost of some overhead.
+    """
+
+    INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.1))
+    THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", 0.1))
+    DEBUG = os.getenv("LOOP_LAG_DEBUG", "false").lower() == "true"
+    SAMPLES = 600
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._lags = deque(maxlen=self.SAMPLES)
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.last_stall_at: Optional[float] = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self.DEBUG:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.THRESHOLD
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started_at = time.perf_counter()
+            await asyncio.sleep(self.INTERVAL)
+            lag = max(0.0, time.perf_counter() - started_at - self.INTERVAL)
+            self._lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.THRESHOLD:
+                self.stalls += 1
+                self.last_stall_at = time.time()
+                print(f"Event loop blocked for {lag * 1000:.1f}ms")
+
+    def stats(self) -> dict:
+        lags = sorted(self._lags)
+        p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))] if lags else None
+        return {
+            "threshold_ms": round(self.THRESHOLD * 1000, 1),
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "lag_p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            "last_stall_at": self.last_stall_at,
+        }
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,47 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+
+import orjson
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    """
+    Raised when a pagination cursor cannot be decoded.
+    """
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """
+    Builds an opaque cursor pointing at a row, ordered by creation date then id.
+    :param created_at: Creation date of the last row of the page.
+    :param row_id: Id of the last row of the page, breaking ties between equal dates.
+    :return: URL-safe cursor.
+    """
+    payload = orjson.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    """
+    :param cursor: (Optional) Cursor returned with the previous page.
+    :return: Tuple with the creation date and the id of the row, or None for the first page.
+    :raise InvalidCursorError: If the cursor was not built by encode_cursor.
+    """
+    if not cursor:
+        return None
+    try:
+        created_at, row_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def page_size(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
@@ -0,0 +1,190 @@
+import asyncio
+import inspect
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.utils.deadline import Deadline, DeadlineExceededError, record_deadline_miss
+
+
+class PipelineStage:
+    """
+    A single unit of work inside a Pipeline.
+    """
+
+    def __init__(self, name: str, func: Callable, depends_on: Iterable[str] = (),
+                 budget_share: Optional[float] = None, fallback: Optional[Callable[[], Any]] = None,
+                 executor: Optional[Executor] = None):
+        """
+        :param name: Unique name of the stage, also used as the key of its result.
+        :param func: Callable (sync or async) receiving the results of its dependencies as keyword arguments.
+        :param depends_on: Names of the stages whose results this stage needs.
+        :param budget_share: (Optional) Fraction of the remaining pipeline deadline the stage may take.
+        :param fallback: (Optional) Callable returning the result to use when the stage misses its deadline.
+        :param executor: (Optional) Executor running the stage if it is synchronous.
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.budget_share = budget_share
+        self.fallback = fallback
+        self.executor = executor
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.deadline_missed = False
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class Pipeline:
+    """
+    Runs a set of dependent stages concurrently, only waiting where a stage needs
+    the result of another one. Synchronous stages are run in an executor (the stage's,
+    else the pipeline's, else the loop's default one) so blocking calls do not
+    serialize the pipeline nor block the event loop.
+
+    With a deadline, stages given a budget share are cancelled once they take longer
+    than that share of the time left when they started. Their fallback result is used
+    instead, so the pipeline degrades rather than failing; stages without a fallback
+    raise DeadlineExceededError.
+    """
+
+    def __init__(self, name: str, on_stage_complete: Optional[Callable[[PipelineStage, Any], None]] = None,
+                 deadline: Optional[Deadline] = None, executor: Optional[Executor] = None):
+        """
+        :param name: Name of the pipeline, used in the timing report.
+        :param on_stage_complete: (Optional) Callback invoked with each stage and its result as soon as it finishes.
+        :param deadline: (Optional) Deadline of the request running the pipeline.
+        :param executor: (Optional) Executor running the synchronous stages that do not set their own.
+        """
+        self.name = name
+        self.on_stage_complete = on_stage_complete
+        self.deadline = deadline
+        self.executor = executor
+        self.stages: Dict[str, PipelineStage] = {}
+        self.results: Dict[str, Any] = {}
+        self._started_at: Optional[float] = None
+
+    def add_stage(self, name: str, func: Callable, depends_on: Iterable[str] = (),
+                  budget_share: Optional[float] = None, fallback: Optional[Callable[[], Any]] = None,
+                  executor: Optional[Executor] = None) -> "Pipeline":
+        """
+        Registers a stage in the pipeline.
+        :param name: Unique name of the stage.
+        :param func: Callable receiving the dependency results as keyword arguments.
+        :param depends_on: Names of previously registered stages this stage waits for.
+        :param budget_share: (Optional) Fraction of the remaining deadline the stage may take.
+        :param fallback: (Optional) Callable returning the result to use when the stage misses its deadline.
+        :param executor: (Optional) Executor running the stage if it is synchronous, instead of the pipeline's.
+        :return: The pipeline itself, so calls can be chained.
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already registered in pipeline '{self.name}'")
+        for dependency in depends_on:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+        self.stages[name] = PipelineStage(name, func, depends_on, budget_share, fallback, executor)
+        return self
+
+    async def _run_stage(self, stage: PipelineStage, tasks: Dict[str, asyncio.Task]) -> Any:
+        dependencies = {name: await tasks[name] for name in stage.depends_on}
+
+        stage.started_at = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(stage.func):
+                execution = stage.func(**dependencies)
+            else:
+                loop = asyncio.get_running_loop()
+                execution = loop.run_in_executor(stage.executor or self.executor,
+                                                 lambda: stage.func(**dependencies))
+
+            if self.deadline is None or stage.budget_share is None:
+                result = await execution
+            else:
+                try:
+                    result = await asyncio.wait_for(execution, self.deadline.timeout(stage.budget_share))
+                except asyncio.TimeoutError:
+                    stage.deadline_missed = True
+                    record_deadline_miss(self.name, stage.name)
+                    if stage.fallback is None:
+                        raise DeadlineExceededError(
+                            f"Stage '{stage.name}' of pipeline '{self.name}' missed the request deadline")
+                    result = stage.fallback()
+        finally:
+            stage.finished_at = time.perf_counter()
+
+        self.results[stage.name] = result
+        if self.on_stage_complete is not None:
+            self.on_stage_complete(stage, result)
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Executes every stage, starting each one as soon as its dependencies finish.
+        :return: Dictionary mapping stage names to their results.
+        """
+        self._started_at = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        # Stages are registered after their dependencies, so creating the tasks in
+        # insertion order guarantees every awaited dependency already has a task.
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(self._run_stage(stage, tasks))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        finally:
+            self.report()
+
+        return self.results
+
+    def critical_path(self) -> List[str]:
+        """
+        Follows, from the last stage to finish, the dependency that finished last.
+        :return: Stage names on the critical path, in execution order.
+        """
+        finished = [stage for stage in self.stages.values() if stage.finished_at is not None]
+        if not finished:
+            return []
+
+        path = []
+        stage = max(finished, key=lambda s: s.finished_at)
+        while stage is not None:
+            path.append(stage.name)
+            dependencies = [self.stages[name] for name in stage.depends_on
+                            if self.stages[name].finished_at is not None]
+            stage = max(dependencies, key=lambda s: s.finished_at) if dependencies else None
+        return list(reversed(path))
+
+    def timings(self) -> Dict[str, dict]:
+        """
+        :return: Start offset, end offset and duration (in milliseconds) of every executed stage.
+        """
+        timings = {}
+        for stage in self.stages.values():
+            if stage.started_at is None or stage.finished_at is None:
+                continue
+            timings[stage.name] = {
+                "start_ms": round((stage.started_at - self._started_at) * 1000, 1),
+                "end_ms": round((stage.finished_at - self._started_at) * 1000, 1),
+                "duration_ms": round(stage.duration * 1000, 1),
+            }
+        return timings
+
+    def report(self):
+        """
+        Prints the per-stage timings and the critical path of the last run.
+        """
+        timings = self.timings()
+        stages = ", ".join(
+            f"{name}={timing['duration_ms']}ms@{timing['start_ms']}ms" for name, timing in timings.items()
+        )
+        print(f"Pipeline '{self.name}' timings: {stages}")
+        print(f"Pipeline '{self.name}' critical path: {' -> '.join(self.critical_path())}")
@@ -0,0 +1,74 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class SlowQueryLog:
+    """
+    Logs the queries of an engine that take longer than SLOW_QUERY_THRESHOLD seconds,
+    only printing a SAMPLE_RATE fraction of them so a slow database does not flood
+    stdout. Every slow query is counted, logged or not.
+    """
+
+    SLOW_QUERY_THRESHOLD = float(os.getenv("DB_SLOW_QUERY_THRESHOLD", 0.5))
+    SAMPLE_RATE = float(os.getenv("DB_SLOW_QUERY_SAMPLE_RATE", 1.0))
+    MAX_STATEMENT_LENGTH = 500
+
+    def __init__(self, name: str):
+        """
+        :param name: Name of the engine, used in the log lines and the metrics.
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.slow_queries = 0
+        self.logged = 0
+        self.slowest = 0.0
+
+    def install(self, engine: Engine):
+        """
+        Times every statement executed through the engine.
+        """
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started_at = conn.info["query_started_at"].pop()
+        duration = time.perf_counter() - started_at
+        with self._lock:
+            self.queries += 1
+            if duration < self.SLOW_QUERY_THRESHOLD:
+                return
+            self.slow_queries += 1
+            self.slowest = max(self.slowest, duration)
+            if random.random() >= self.SAMPLE_RATE:
+                return
+            self.logged += 1
+        # Parameters are left out, they may hold user data (e.g., password hashes)
+        print(f"Slow query on '{self.name}' ({duration * 1000:.1f}ms): "
+              f"{' '.join(statement.split())[:self.MAX_STATEMENT_LENGTH]}")
+
+    def _handle_error(self, context):
+        # Failed statements never reach after_cursor_execute, drop their start time
+        if context.connection is not None and context.cursor is not None:
+            started_at = context.connection.info.get("query_started_at")
+            if started_at:
+                started_at.pop()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "slow_queries": self.slow_queries,
+                "logged": self.logged,
+                "slowest_ms": round(self.slowest * 1000, 1),
+            }
@@ -0,0 +1,317 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict
+
+import httpx
+from groq import APIConnectionError, APIStatusError
+
+from app.utils.deadline import Deadline, DeadlineExceededError
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream endpoint whose circuit breaker is open.
+    """
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """
+    Whether an error means the upstream is unhealthy (timeouts, connection errors,
+    5xx and 429 responses), as opposed to a problem with the request itself.
+    """
+    if isinstance(error, (httpx.TransportError, APIConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        status_code = error.status_code
+    elif isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+    else:
+        return False
+    return status_code >= 500 or status_code == 429
+
+
+def raise_for_upstream_status(response: httpx.Response) -> httpx.Response:
+    """
+    Raises for 5xx and 429 responses only, so callers can still handle other statuses (e.g., 409).
+    """
+    if response.status_code >= 500 or response.status_code == 429:
+        response.raise_for_status()
+    return response
+
+
+class CircuitBreaker:
+    """
+    Stops calling an endpoint after FAILURE_THRESHOLD consecutive failures. Once
+    RECOVERY_TIMEOUT seconds have passed a single probe call is let through: its
+    success closes the circuit again, its failure keeps it open.
+    """
+
+    FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+    RECOVERY_TIMEOUT = float(os.getenv("BREAKER_RECOVERY_TIMEOUT", 30))
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = None, recovery_timeout: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or self.FAILURE_THRESHOLD
+        self.recovery_timeout = self.RECOVERY_TIMEOUT if recovery_timeout is None else recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow(self):
+        """
+        :raise CircuitOpenError: If the circuit is open, or half-open with a probe already running.
+        """
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                print(f"Circuit '{self.name}' opened after {self.consecutive_failures} consecutive failure(s)")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """
+        Ends a call that was neither a success nor an upstream failure (e.g., cancelled).
+        """
+        self._probing = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries (and hedges) to a fraction of the calls: every call
+    deposits RATIO tokens, every retry withdraws one. A small time-based allowance
+    keeps retries possible on low traffic. Retries therefore cannot multiply the load
+    on an upstream that is already struggling.
+    """
+
+    RATIO = float(os.getenv("RETRY_BUDGET_RATIO", 0.2))
+    MIN_PER_SECOND = float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", 1))
+    MAX_TOKENS = float(os.getenv("RETRY_BUDGET_MAX_TOKENS", 20))
+
+    def __init__(self):
+        self.tokens = self.MAX_TOKENS
+        self._refilled_at = time.monotonic()
+        self.retries = 0
+        self.exhausted = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.MAX_TOKENS, self.tokens + (now - self._refilled_at) * self.MIN_PER_SECOND)
+        self._refilled_at = now
+
+    def deposit(self):
+        self._refill()
+        self.tokens = min(self.MAX_TOKENS, self.tokens + self.RATIO)
+
+    def try_withdraw(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+    def stats(self) -> dict:
+        self._refill()
+        return {"tokens": round(self.tokens, 2), "retries": self.retries, "exhausted": self.exhausted}
+
+
+class Upstream:
+    """
+    Resilience layer for one upstream host: a circuit breaker per endpoint, a retry
+    budget shared by its endpoints, jittered exponential backoff for idempotent calls
+    and hedged requests.
+    """
+
+    MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", 2))
+    BACKOFF_BASE = float(os.getenv("UPSTREAM_BACKOFF_BASE", 0.2))
+    BACKOFF_MAX = float(os.getenv("UPSTREAM_BACKOFF_MAX", 2))
+    # Hedge after the observed p95 latency once there are enough samples, never sooner than the minimum
+    HEDGE_DELAY = float(os.getenv("UPSTREAM_HEDGE_DELAY", 2))
+    HEDGE_MIN_DELAY = float(os.getenv("UPSTREAM_HEDGE_MIN_DELAY", 0.5))
+    HEDGE_MIN_SAMPLES = 20
+    LATENCY_SAMPLES = 200
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retry_budget = RetryBudget()
+        self.hedges = 0
+        self.hedges_won = 0
+        self._latencies = deque(maxlen=self.LATENCY_SAMPLES)
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(f"{self.name}:{endpoint}")
+            self.breakers[endpoint] = breaker
+        return breaker
+
+    def latency_percentile(self, percentile: float) -> float:
+        if not self._latencies:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile))]
+
+    def hedge_delay(self) -> float:
+        if len(self._latencies) < self.HEDGE_MIN_SAMPLES:
+            return self.HEDGE_DELAY
+        return max(self.HEDGE_MIN_DELAY, self.latency_percentile(0.95))
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter, so clients retrying together do not hit the upstream in waves
+        return random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** attempt))
+
+    async def _attempt(self, breaker: CircuitBreaker, func: Callable[[], Awaitable[Any]]) -> Any:
+        breaker.allow()
+        started_at = time.monotonic()
+        try:
+            result = await func()
+        except DeadlineExceededError:
+            # Raised before the request was sent, it says nothing about the upstream
+            breaker.release()
+            raise
+        except Exception as e:
+            if is_upstream_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        self._latencies.append(time.monotonic() - started_at)
+        return result
+
+    async def call(self, endpoint: str, func: Callable[[], Awaitable[Any]], idempotent: bool = False,
+                   deadline: Deadline = None) -> Any:
+        """
+        Calls the upstream through the endpoint circuit breaker.
+        :param endpoint: Name of the endpoint, each one has its own breaker.
+        :param func: Coroutine function making the call. It must raise on upstream failures.
+        :param idempotent: Whether the call can safely be repeated. Only idempotent calls are retried.
+        :param deadline: (Optional) Deadline of the request, no retry is attempted past it.
+        :return: The result of func.
+        :raise CircuitOpenError: If the breaker of the endpoint is open.
+        """
+        breaker = self.breaker(endpoint)
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(breaker, func)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if not idempotent or not is_upstream_failure(e) or attempt >= self.MAX_RETRIES:
+                    raise
+                backoff = self._backoff(attempt)
+                if deadline is not None and deadline.remaining() <= backoff:
+                    raise
+                if not self.retry_budget.try_withdraw():
+                    raise
+                print(f"Retrying {self.name}:{endpoint} in {backoff:.2f}s after: {e}")
+                await asyncio.sleep(backoff)
+                attempt += 1
+
+    async def hedged_call(self, endpoint: str, func: Callable[[], Awaitable[Any]], hedge_delay: float = None,
+                          deadline: Deadline = None) -> Any:
+        """
+        Calls an idempotent endpoint and, if it has not answered after hedge_delay, sends
+        a second identical request; the first successful answer wins and the other one
+        is cancelled. Hedges are paid from the retry budget.
+        :param endpoint: Name of the endpoint.
+        :param func: Coroutine function making the call.
+        :param hedge_delay: (Optional) Seconds to wait before hedging. Defaults to the observed p95 latency.
+        :param deadline: (Optional) Deadline of the request.
+        :return: The result of the first successful call.
+        """
+        if hedge_delay is None:
+            hedge_delay = self.hedge_delay()
+
+        primary = asyncio.ensure_future(self.call(endpoint, func, idempotent=True, deadline=deadline))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done and self.retry_budget.try_withdraw():
+                self.hedges += 1
+                tasks.add(asyncio.ensure_future(self._attempt(self.breaker(endpoint), func)))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        p95 = self.latency_percentile(0.95)
+        return {
+            "breakers": {endpoint: breaker.stats() for endpoint, breaker in self.breakers.items()},
+            "retry_budget": self.retry_budget.stats(),
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+upstreams: Dict[str, Upstream] = {}
+
+
+def get_upstream(name: str) -> Upstream:
+    """
+    Returns the resilience layer of an upstream host, created on first use.
+    """
+    upstream = upstreams.get(name)
+    if upstream is None:
+        upstream = Upstream(name)
+        upstreams[name] = upstream
+    return upstream
+
+
+def get_upstream_stats() -> Dict[str, dict]:
+    return {name: upstream.stats() for name, upstream in upstreams.items()}
@@ -0,0 +1,11 @@
+import orjson
+
+
+def format_sse(event: str, data) -> str:
+    """
+    Formats a server-sent event.
+    :param event: Name of the event.
+    :param data: JSON-serializable payload of the event.
+    :return: The event, ready to be written to a text/event-stream response.
+    """
+    return f"event: {event}\ndata: {orjson.dumps(data, default=str).decode()}\n\n"
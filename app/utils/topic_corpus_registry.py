@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.config.db import SessionLocal
+from app.models.chat import Chat
+from app.models.topic_corpus import TopicCorpus
+from app.utils.executors import blocking_executors
+from app.utils.groq import normalize_description
+
+
+class TopicCorpusRegistry:
+    """
+    Maps a normalized news query and language to a corpus that already has its sources
+    indexed, so a new chat on the same topic can skip scraping and indexing. Each entry
+    counts the chats currently answering their first turn from its corpus, and is only
+    removed once it is both expired and unreferenced.
+
+    Shared corpora are only indexed into by first turns: a reply moves its chat to a
+    corpus of its own (see is_shared), so one user's sources never reach another user's
+    chat. The chat keeps searching the shared corpus as its source corpus.
+    """
+
+    TTL = float(os.getenv("TOPIC_CORPUS_TTL", 2 * 60 * 60))
+    SWEEP_INTERVAL = float(os.getenv("TOPIC_CORPUS_SWEEP_INTERVAL", 10 * 60))
+
+    _sweeper_task: asyncio.Task = None
+
+    @staticmethod
+    def make_topic_key(query: str, language: str) -> str:
+        normalized = f"{(language or '').lower()}|{normalize_description(query)}"
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def acquire(query: str, language: str) -> Optional[str]:
+        """
+        Looks up a fresh corpus for the topic and takes a reference on it.
+        :return: The corpus key, or None if no fresh corpus exists for the topic.
+        """
+        topic_key = TopicCorpusRegistry.make_topic_key(query, language)
+        with SessionLocal() as db:
+            topic_corpus = (
+                db.query(TopicCorpus)
+                .filter(TopicCorpus.topic_key == topic_key, TopicCorpus.expires_at > datetime.now())
+                .order_by(TopicCorpus.expires_at.desc())
+                .with_for_update()
+                .first()
+            )
+            if topic_corpus is None:
+                return None
+            topic_corpus.ref_count += 1
+            corpus_key = topic_corpus.corpus_key
+            db.commit()
+            return corpus_key
+
+    @staticmethod
+    def register(query: str, language: str, corpus_key: str, ref_count: int = 1) -> str:
+        """
+        Records a freshly indexed corpus for the topic, referenced by the chat that created it.
+        :return: The corpus key, now referenced.
+        """
+        now = datetime.now()
+        with SessionLocal() as db:
+            db.add(TopicCorpus(
+                topic_key=TopicCorpusRegistry.make_topic_key(query, language),
+                query=query,
+                language=language,
+                corpus_key=corpus_key,
+                ref_count=ref_count,
+                created_at=now,
+                expires_at=now + timedelta(seconds=TopicCorpusRegistry.TTL)
+            ))
+            db.commit()
+        return corpus_key
+
+    @staticmethod
+    def release(corpus_key: str):
+        """
+        Drops a reference on the registered corpus, if any.
+        """
+        with SessionLocal() as db:
+            topic_corpus = (
+                db.query(TopicCorpus)
+                .filter(TopicCorpus.corpus_key == corpus_key)
+                .with_for_update()
+                .first()
+            )
+            if topic_corpus is not None and topic_corpus.ref_count > 0:
+                topic_corpus.ref_count -= 1
+                db.commit()
+
+    @staticmethod
+    def is_shared(corpus_key: str, db: Session) -> bool:
+        """
+        Whether a corpus may serve other chats: it is registered for a topic, or several
+        chats answer from it or search it as their source corpus. Replies must not index
+        into such a corpus.
+        """
+        registered = db.query(TopicCorpus.id).filter(TopicCorpus.corpus_key == corpus_key).first()
+        if registered is not None:
+            return True
+        return TopicCorpusRegistry._chats_using(db, [corpus_key]).limit(2).count() > 1
+
+    @staticmethod
+    def _chats_using(db: Session, corpus_keys: List[str]):
+        return db.query(Chat).filter(or_(Chat.corpus_key.in_(corpus_keys), Chat.source_corpus_key.in_(corpus_keys)))
+
+    @staticmethod
+    def claim_expired() -> List[str]:
+        """
+        Removes the expired entries that no chat is answering from anymore.
+        :return: Keys of the corpora that can be deleted from Vectara. Corpora persisted
+            chats still answer from or search are kept, they are only no longer offered to new chats.
+        """
+        with SessionLocal() as db:
+            expired = (
+                db.query(TopicCorpus)
+                .filter(TopicCorpus.expires_at <= datetime.now(), TopicCorpus.ref_count <= 0)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            expired_keys = [topic_corpus.corpus_key for topic_corpus in expired]
+            used_keys = set()
+            if expired_keys:
+                for chat in TopicCorpusRegistry._chats_using(db, expired_keys).with_entities(
+                        Chat.corpus_key, Chat.source_corpus_key).distinct():
+                    used_keys.update(chat)
+            for topic_corpus in expired:
+                db.delete(topic_corpus)
+            db.commit()
+            return [corpus_key for corpus_key in expired_keys if corpus_key not in used_keys]
+
+    @staticmethod
+    async def _sweep():
+        # Imported here to avoid a circular import, the Vectara client uses the registry
+        from app.utils.vectara import VectaraClient
+
+        while True:
+            await asyncio.sleep(TopicCorpusRegistry.SWEEP_INTERVAL)
+            try:
+                corpus_keys = await blocking_executors.run_db(TopicCorpusRegistry.claim_expired)
+                for corpus_key in corpus_keys:
+                    await VectaraClient().delete_corpus(corpus_key)
+            except Exception as e:
+                print(f"Error sweeping expired topic corpora: {e}")
+
+    @staticmethod
+    async def start_sweeper():
+        """
+        Starts the periodic removal of expired, unreferenced corpora.
+        """
+        TopicCorpusRegistry._sweeper_task = asyncio.create_task(TopicCorpusRegistry._sweep())
+
+    @staticmethod
+    async def stop_sweeper():
+        task = TopicCorpusRegistry._sweeper_task
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            TopicCorpusRegistry._sweeper_task = None
@@ -1,22 +1,41 @@
+import asyncio
 from datetime import datetime
+from functools import partial
 import os
-import json
 import string
-import requests
-from dotenv import load_dotenv
+import httpx
+import orjson
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
+from app.config.db import SessionLocal
 from app.chat.schemas.message_schema import MessageDemoRequest, MessageRequest, MessageTurnRequest
+from app.enums.answer_type_enum import AnswerTypeEnum
+from app.enums.source_mode_enum import SourceModeEnum
 from app.models.chat import Chat
+from app.models.chat_summary import ChatSummary
 from app.models.message import Message
 from app.profiles.services.profiles_services import ProfileService  
 import random
 
+from app.utils.chat_history_cache import chat_history_cache
+from app.utils.chat_persistence import MessageWriter, message_writer, unit_of_work
+from app.utils.chat_summaries import ChatSummaries
+from app.utils.corpus_pool import corpus_pool
+from app.utils.deadline import Deadline, DeadlineExceededError, record_deadline_miss, timeout_options
+from app.utils.dedup import deduplicate_articles
+from app.utils.executors import blocking_executors
 from app.utils.groq import GroqClient
+from app.utils.pagination import decode_cursor, encode_cursor, page_size
+from app.utils.http_clients import upstream_clients
+from app.utils.pipeline import Pipeline
+from app.utils.resilience import get_upstream, is_upstream_failure, raise_for_upstream_status
+from app.utils.topic_corpus_registry import TopicCorpusRegistry
+from app.utils.vectara_documents import build_article_document
+from app.utils.vectara_payloads import build_chat_payload
+from app.utils.webscrapping.article_fetcher import ArticleFetcher, ContentBudget
 from app.utils.webscrapping.bing_scraper import BingNewsWebScraper
 from app.utils.webscrapping.google_scraper import GoogleNewsWebScraper
 
-load_dotenv()
-
 
 class VectaraClient:
     """
@@ -24,24 +43,310 @@ class VectaraClient:
     indexing documents, and managing chats.
     """
 
-    BASE_URL = "https://api.vectara.io/v2"
-    API_KEY = os.getenv("VECTARA_API_KEY")
+    INDEX_CONCURRENCY = int(os.getenv("VECTARA_INDEX_CONCURRENCY", 4))
+
+    # Where sources come from when the request does not say: full article pages, search
+    # snippets only, or snippets first and the full pages indexed in the background
+    DEFAULT_SOURCE_MODE = SourceModeEnum(os.getenv("SOURCE_MODE_DEFAULT", SourceModeEnum.Full.value))
+    DEMO_SOURCE_MODE = SourceModeEnum(os.getenv("SOURCE_MODE_DEMO", SourceModeEnum.Hybrid.value))
+    ANSWER_TYPE_SOURCE_MODES = {
+        AnswerTypeEnum.Meme: SourceModeEnum.Snippets,
+    }
 
-    def __init__(self):
-        if not self.API_KEY:
-            raise ValueError("VECTARA_API_KEY is not set in the environment.")
+    # Keeps background enrichments referenced until they finish
+    _background_tasks = set()
 
-    def _get_headers(self):
+    # Fraction of the time left on the request deadline each pipeline stage may take
+    # when it starts. Sources only get part of their share for fetching articles, so
+    # they return what they have fetched so far instead of being cut off.
+    STAGE_BUDGET_SHARES = {
+        "query": 0.2,
+        "topic": 0.1,
+        "corpus": 0.3,
+        "google": 0.5,
+        "bing": 0.5,
+        "index_bing": 0.5,
+        "index_google": 0.5,
+    }
+    SOURCE_FETCH_SHARE = 0.4
+    # Answering is worth attempting even when the sources used up the deadline
+    ANSWER_MIN_TIMEOUT = float(os.getenv("CHAT_ANSWER_MIN_TIMEOUT", 5))
+
+    def __init__(self, http: httpx.AsyncClient = None):
         """
-        Helper method to generate headers for API requests.
+        Args:
+            http (httpx.AsyncClient): Client for the Vectara API. Defaults to the shared
+                keep-alive pool created at startup.
         """
-        return {
-            'Content-Type': 'application/json',
-            'Accept': 'application/json',
-            'x-api-key': self.API_KEY
-        }
+        self.http = http or upstream_clients.get_vectara()
+
+    @classmethod
+    def _source_mode(cls, message, demo: bool = False) -> SourceModeEnum:
+        """
+        Resolves the source mode of a request: the one it asks for, else the one of its
+        answer type, else the demo or default mode.
+        """
+        if message.source_mode is not None:
+            return message.source_mode
+        if message.answer_type in cls.ANSWER_TYPE_SOURCE_MODES:
+            return cls.ANSWER_TYPE_SOURCE_MODES[message.answer_type]
+        return cls.DEMO_SOURCE_MODE if demo else cls.DEFAULT_SOURCE_MODE
 
-    def create_corpus(self) -> str:
+    def _build_sources_pipeline(self, name: str, user_description: str, corpus_stage,
+                                reuse_topic_corpus: bool = False, on_stage_complete=None,
+                                source_mode: SourceModeEnum = SourceModeEnum.Full,
+                                deadline: Deadline = None, topic_refs: list = None) -> Pipeline:
+        """
+        Builds the pipeline that resolves a corpus, generates the news query, scrapes
+        Google and Bing, drops near-duplicate articles and indexes both results.
+        Independent stages run concurrently: the corpus is resolved alongside the query
+        generation, both scrapers run at the same time and both sources are uploaded together.
+        The scrapers share a ContentBudget, so article fetching stops as soon as both
+        together have collected enough text, and slow news sites are cancelled.
+
+        When reuse_topic_corpus is set, the generated query is first looked up in the
+        topic corpus registry. On a hit the registered corpus is used and scraping and
+        indexing are skipped; on a miss the new corpus is registered once indexed.
+        Either way a reference is taken on the topic corpus and its key appended to
+        topic_refs; the caller must release them with _release_topic_refs once the
+        first turn is answered, even if the pipeline fails.
+
+        With the Snippets and Hybrid source modes, documents are built from the search
+        snippets and no article page is downloaded before answering. Hybrid then indexes
+        the full pages in the background, so later turns and chats on the topic get them.
+        Snippet-only corpora are not shared as topic corpora.
+
+        With a deadline, each stage gets a share of the time left (STAGE_BUDGET_SHARES).
+        A late query falls back to one built from the description, late sources to the
+        articles fetched so far and late indexing to the documents uploaded so far, so
+        the chat is answered with what is available. Only a missing corpus fails it.
+
+        Args:
+            name (str): Name of the pipeline, used in the timing report.
+            user_description (str): The user entry used to generate the news query.
+            corpus_stage (Callable): Stage returning the corpus key to index into.
+            reuse_topic_corpus (bool): Whether to reuse and register topic corpora.
+            on_stage_complete (Callable): Optional callback invoked as each stage finishes.
+            source_mode (SourceModeEnum): Whether to index full pages, snippets or both.
+            deadline (Deadline): Optional deadline of the request.
+            topic_refs (list): Collects the topic corpora referenced, required with reuse_topic_corpus.
+
+        Returns:
+            Pipeline: The pipeline, ready to run.
+        """
+        budget = ContentBudget()
+
+        async def query():
+            return await GroqClient().generate_news_query(user_description=user_description, deadline=deadline)
+
+        async def topic(query):
+            return await self._take_topic_ref(topic_refs, TopicCorpusRegistry.acquire, query["query"],
+                                              query["language"])
+
+        async def corpus(topic):
+            return topic or await corpus_stage()
+
+        async def google(query, topic=None):
+            if topic:
+                return []
+            if deadline is not None:
+                budget.cap(deadline.timeout(self.SOURCE_FETCH_SHARE))
+            return await GoogleNewsWebScraper().get_news(
+                query=query["query"], language=query["language"], max_results=5, budget=budget, mode=source_mode,
+                deadline=deadline)
+
+        async def bing(query, topic=None):
+            if topic:
+                return []
+            if deadline is not None:
+                budget.cap(deadline.timeout(self.SOURCE_FETCH_SHARE))
+            return await BingNewsWebScraper().get_news(
+                query=query["query"], language=query["language"], max_results=5, budget=budget, mode=source_mode,
+                deadline=deadline)
+
+        def dedup(google, bing, topic=None):
+            if topic:
+                return None
+            articles, report = deduplicate_articles({"google": google, "bing": bing})
+            print(f"Deduplicated sources for '{name}': {report}")
+            return {**articles, "report": report}
+
+        async def index_bing(corpus, query, dedup, topic=None):
+            if topic:
+                return None
+            return await self.index_articles(dedup["bing"], query["language"], corpus, source="bing",
+                                             deadline=deadline)
+
+        async def index_google(corpus, query, dedup, topic=None):
+            if topic:
+                return None
+            return await self.index_articles(dedup["google"], query["language"], corpus, source="google",
+                                             deadline=deadline)
+
+        async def enrich(corpus, query, dedup, topic=None):
+            if topic:
+                return None
+            articles_by_source = {source: dedup[source] for source in ("google", "bing")}
+            self._schedule_enrichment(articles_by_source, query["language"], corpus)
+            return sum(len(articles) for articles in articles_by_source.values())
+
+        async def register_topic(topic, corpus, query, index_bing, index_google):
+            # Only share corpora whose sources were fully indexed, not cut short by the deadline
+            if topic or source_mode == SourceModeEnum.Snippets or any(
+                    result.get("status") != "success" for result in (index_bing, index_google)):
+                return None
+            if any(pipeline.stages[stage].deadline_missed for stage in ("query", "google", "bing")):
+                return None
+            return await self._take_topic_ref(topic_refs, TopicCorpusRegistry.register, query["query"],
+                                              query["language"], corpus)
+
+        def index_deadline_missed():
+            return {"status": "error", "message": "Indexing did not finish before the request deadline"}
+
+        shares = self.STAGE_BUDGET_SHARES
+        # Synchronous corpus stages query the database
+        pipeline = Pipeline(name, on_stage_complete=on_stage_complete, deadline=deadline,
+                            executor=blocking_executors.db)
+        pipeline.add_stage("query", query, budget_share=shares["query"],
+                           fallback=lambda: GroqClient.fallback_query(user_description))
+        if reuse_topic_corpus:
+            pipeline.add_stage("topic", topic, depends_on=["query"], budget_share=shares["topic"], fallback=lambda: None)
+            pipeline.add_stage("corpus", corpus, depends_on=["topic"], budget_share=shares["corpus"])
+            sources_depend_on = ["query", "topic"]
+        else:
+            pipeline.add_stage("corpus", corpus_stage, budget_share=shares["corpus"])
+            sources_depend_on = ["query"]
+        pipeline.add_stage("google", google, depends_on=sources_depend_on, budget_share=shares["google"],
+                           fallback=lambda: [])
+        pipeline.add_stage("bing", bing, depends_on=sources_depend_on, budget_share=shares["bing"],
+                           fallback=lambda: [])
+        pipeline.add_stage("dedup", dedup, executor=blocking_executors.cpu,
+                           depends_on=["google", "bing"] + (["topic"] if reuse_topic_corpus else []))
+        pipeline.add_stage("index_bing", index_bing, depends_on=["corpus", "dedup"] + sources_depend_on,
+                           budget_share=shares["index_bing"], fallback=index_deadline_missed)
+        pipeline.add_stage("index_google", index_google, depends_on=["corpus", "dedup"] + sources_depend_on,
+                           budget_share=shares["index_google"], fallback=index_deadline_missed)
+        if source_mode == SourceModeEnum.Hybrid:
+            pipeline.add_stage("enrich", enrich,
+                               depends_on=["corpus", "query", "dedup"] + (["topic"] if reuse_topic_corpus else []))
+        if reuse_topic_corpus:
+            pipeline.add_stage("register_topic", register_topic,
+                               depends_on=["topic", "corpus", "query", "index_bing", "index_google"])
+        return pipeline
+
+    async def _take_topic_ref(self, topic_refs: list, take, *args):
+        """
+        Runs a registry call taking a reference on a topic corpus and records the corpus
+        in topic_refs. The call is shielded: a reference still taken after the stage
+        gave up (e.g., on its deadline) is released as soon as the call returns.
+        """
+        task = asyncio.ensure_future(blocking_executors.run_db(take, *args))
+        try:
+            corpus_key = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            task.add_done_callback(self._release_late_topic_ref)
+            raise
+        if corpus_key:
+            topic_refs.append(corpus_key)
+        return corpus_key
+
+    def _release_late_topic_ref(self, task: asyncio.Future):
+        if not task.cancelled() and task.exception() is None and task.result():
+            self._release_topic_refs([task.result()])
+
+    def _release_topic_refs(self, topic_refs: list):
+        """
+        Drops the references taken on topic corpora in the background, so it also
+        happens when the request is cancelled.
+        """
+        if not topic_refs:
+            return
+
+        async def release():
+            for corpus_key in topic_refs:
+                try:
+                    await blocking_executors.run_db(TopicCorpusRegistry.release, corpus_key)
+                except Exception as e:
+                    print(f"Error releasing topic corpus {corpus_key}: {e}")
+
+        task = asyncio.ensure_future(release())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def _schedule_enrichment(self, articles_by_source: dict, lang: str, corpus_key: str):
+        """
+        Downloads the full pages of snippet articles and indexes them in the background.
+
+        Args:
+            articles_by_source (dict): Snippet articles, keyed by search engine.
+            lang (str): The language of the articles.
+            corpus_key (str): The key of the corpus.
+        """
+        async def enrich():
+            try:
+                budget = ContentBudget()
+                articles = await asyncio.gather(*(
+                    ArticleFetcher.collect([article["link"] for article in snippets], budget)
+                    for snippets in articles_by_source.values()))
+                results = await asyncio.gather(*(
+                    self.index_articles(full_articles, lang, corpus_key, source=source)
+                    for source, full_articles in zip(articles_by_source, articles)))
+                print(f"Enriched corpus {corpus_key} with full articles: {dict(zip(articles_by_source, results))}")
+            except Exception as e:
+                print(f"Error enriching corpus {corpus_key}: {e}")
+
+        task = asyncio.ensure_future(enrich())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _request(self, endpoint: str, method: str, path: str, idempotent: bool = False,
+                       deadline: Deadline = None, **kwargs) -> httpx.Response:
+        """
+        Sends a request through the circuit breaker of the endpoint. Idempotent requests
+        are retried on upstream failures, within the Vectara retry budget.
+
+        With a deadline and no explicit timeout, each attempt is bounded by the time left
+        when it starts, and no attempt starts once the deadline has expired.
+
+        Args:
+            endpoint (str): Name of the endpoint, used for its circuit breaker.
+            method (str): HTTP method.
+            path (str): Path relative to the Vectara API base URL.
+            idempotent (bool): Whether the request can safely be repeated.
+            deadline (Deadline): Optional deadline of the request, no retry is attempted past it.
+
+        Returns:
+            httpx.Response: The response. Only 5xx and 429 statuses raise here.
+        """
+        bounded_by_deadline = deadline is not None and "timeout" not in kwargs
+
+        def check_deadline():
+            if deadline.expired:
+                raise DeadlineExceededError(f"Request deadline expired before calling Vectara {endpoint}")
+
+        async def send():
+            if not bounded_by_deadline:
+                return raise_for_upstream_status(await self.http.request(method, path, **kwargs))
+            # Retries get here after a backoff
+            check_deadline()
+            return raise_for_upstream_status(
+                await self.http.request(method, path, **kwargs, **timeout_options(deadline)))
+
+        if bounded_by_deadline:
+            # Before taking the breaker, so an expired request never counts as a probe
+            check_deadline()
+
+        return await get_upstream("vectara").call(endpoint, send, idempotent=idempotent, deadline=deadline)
+
+    def _answer_timeout(self, deadline: Deadline = None) -> dict:
+        return timeout_options(deadline, minimum=self.ANSWER_MIN_TIMEOUT)
+
+    @staticmethod
+    def _record_answer_deadline_miss(scope: str, error: Exception, deadline: Deadline = None):
+        if deadline is not None and isinstance(error, httpx.TimeoutException):
+            record_deadline_miss(scope, "answer")
+
+    async def create_corpus(self) -> str:
         """
         Creates a new corpus in Vectara and stores it in the database.
 
@@ -57,7 +362,7 @@ class VectaraClient:
 
         corpus_key = ''.join(random.choices(string.ascii_letters + string.digits + "_=-", k=32))
 
-        payload = json.dumps({
+        payload = orjson.dumps({
             "key": corpus_key,
             "name": corpus_key,
             "description": "Documents with important information for the prompt.",
@@ -77,9 +382,9 @@ class VectaraClient:
         })
 
         try:
-            response = requests.post(f"{self.BASE_URL}/corpora", headers=self._get_headers(), data=payload)
+            response = await self._request("corpora", "POST", "/corpora", content=payload)
             response.raise_for_status()
-            response_data = response.json()
+            response_data = orjson.loads(response.content)
             corpus_key = response_data.get("key")
             if not corpus_key:
                 raise Exception("Corpus key not returned by API.")
@@ -87,272 +392,204 @@ class VectaraClient:
         except Exception as e:
             raise Exception(f"Failed to create corpus: {e}")
 
-    def index_document(self, text: str, lang: str, corpus_key: str) -> dict:
+    async def delete_corpus(self, corpus_key: str) -> dict:
         """
-        Indexes a document in the specified corpus.
+        Deletes a corpus and every document indexed in it.
 
         Args:
-            text (str): The text of the document to index.
-            lang (str): The language of the document.
             corpus_key (str): The key of the corpus.
 
         Returns:
             dict: A status dictionary indicating success or error.
         """
-        payload = json.dumps({
-            "id": "my-doc-id",
-            "type": "core",
-            "metadata": {
-                "title": "A Nice Document",
-                "lang": lang
-            },
-            "document_parts": [
-                {
-                    "text": text,
-                    "metadata": {
-                        "nice_rank": 9000
-                    },
-                    "context": "string",
-                    "custom_dimensions": {}
-                }
-            ]
-        })
+        try:
+            response = await self._request("corpora", "DELETE", f"/corpora/{corpus_key}", idempotent=True)
+            response.raise_for_status()
+            return {"status": "success", "message": "Corpus deleted successfully"}
+        except Exception as e:
+            return {"status": "error", "message": "Failed to delete corpus", "details": str(e)}
 
+    async def index_document(self, document: dict, corpus_key: str, deadline: Deadline = None) -> dict:
+        """
+        Indexes a document in the specified corpus.
+
+        Args:
+            document (dict): The Vectara core document to index.
+            corpus_key (str): The key of the corpus.
+            deadline (Deadline): Optional deadline of the request, bounding the upload.
+
+        Returns:
+            dict: A status dictionary indicating success or error.
+        """
         try:
-            response = requests.post(f"{self.BASE_URL}/corpora/{corpus_key}/documents",
-                                     headers=self._get_headers(), data=payload)
+            # Document ids are derived from the article URL, so uploads can safely be retried
+            response = await self._request("documents", "POST", f"/corpora/{corpus_key}/documents", idempotent=True,
+                                           deadline=deadline, content=orjson.dumps(document))
+            # Document ids are derived from the article URL, a conflict means it is already indexed
+            if response.status_code == 409:
+                return {"status": "success", "message": "Document already indexed"}
             response.raise_for_status()
             return {"status": "success", "message": "Document indexed successfully"}
         except Exception as e:
             return {"status": "error", "message": "Failed to index document", "details": str(e)}
 
-    def create_new_turn(self, message: MessageRequest, title: str, corpus_key: str, db: Session) -> Chat:
+    async def index_articles(self, articles: list, lang: str, corpus_key: str, source: str = None,
+                             deadline: Deadline = None) -> dict:
+        """
+        Indexes each article as its own document, uploading them concurrently.
+
+        Args:
+            articles (list): Dictionaries with the header, body and link of each article.
+            lang (str): The language of the articles.
+            corpus_key (str): The key of the corpus.
+            source (str): Optional name of the search engine the articles come from.
+            deadline (Deadline): Optional deadline of the request, bounding each upload.
+
+        Returns:
+            dict: A status dictionary with the number of indexed and failed documents.
+        """
+        documents = [document for document in (build_article_document(article, lang, source) for article in articles)
+                     if document is not None]
+        semaphore = asyncio.Semaphore(self.INDEX_CONCURRENCY)
+
+        async def upload(document):
+            async with semaphore:
+                return await self.index_document(document, corpus_key, deadline)
+
+        results = await asyncio.gather(*(upload(document) for document in documents))
+        failed = [result for result in results if result["status"] != "success"]
+        if failed:
+            return {"status": "error", "message": "Failed to index some documents",
+                    "indexed": len(results) - len(failed), "failed": len(failed), "details": failed[0].get("details")}
+        return {"status": "success", "message": "Documents indexed successfully", "indexed": len(results), "failed": 0}
+
+    def _build_chat_payload(self, message, corpus_key: str, max_response_characters: int,
+                            stream_response: bool = False, source_corpus_keys: list = ()) -> bytes:
+        """
+        Builds the body of a Vectara chat or turn request.
+
+        Args:
+            message (MessageRequest | MessageDemoRequest | MessageTurnRequest): The message request object.
+            corpus_key (str): The key of the corpus to search.
+            max_response_characters (int): Maximum length of the generated answer for the endpoint.
+                Short answer types lower it further.
+            stream_response (bool): Whether Vectara should stream the answer as server-sent events.
+            source_corpus_keys (list): Other corpora searched, read-only, along with corpus_key.
+
+        Returns:
+            bytes: The serialized payload.
+        """
+        return build_chat_payload(message.entry, corpus_key, message.tone, message.answer_type,
+                                  max_response_characters, stream_response=stream_response,
+                                  source_corpus_keys=source_corpus_keys)
+
+    async def create_new_turn(self, message: MessageRequest, title: str, corpus_key: str, db: Session,
+                              deadline: Deadline = None) -> Chat:
         """
         Creates a new chat with the specified query and corpus.
 
         Args:
             entry (str): The query for the chat.
             corpus_key (str): The key of the corpus.
+            deadline (Deadline): Optional deadline of the request, bounding the generation.
 
         Returns:
             dict: A status dictionary indicating success or error.
         """
-        payload = json.dumps({
-            "query": message.entry,
-            "search": {
-                "corpora": [
-                {
-                    "custom_dimensions": {},
-                    "metadata_filter": None,
-                    "lexical_interpolation": 0.025,
-                    "semantics": "default",
-                    "corpus_key": corpus_key
-                }
-                ],
-                "offset": 0,
-                "limit": 10,
-                "context_configuration": {
-                "characters_before": 30,
-                "characters_after": 30,
-                "sentences_before": 3,
-                "sentences_after": 3,
-                "start_tag": "<em>",
-                "end_tag": "</em>"
-                },
-                "reranker": {
-                "type": "customer_reranker",
-                "reranker_name": "Rerank_Multilingual_v1",
-                "limit": 1,
-                "cutoff": 0
-                }
-            },
-            "generation": {
-                "generation_preset_name": "vectara-summary-ext-v1.2.0",
-                "max_used_search_results": 5,
-                "prompt_template": f"""
-                [
-                {{"role": "system", "content": "You are a helpful assistant. You will create a response based on the user's query and the tone provided."}},
-                {{"role": "user", "content": "{message.entry}, with a {message.tone.value} tone."}},
-                {{"role": "assistant", "content": "Generate a response with the specified tone: {message.tone.value}"}}
-                ]
-                """,
-                "max_response_characters": 250,
-                "response_language": "auto",
-                "model_parameters": {
-                "max_tokens": 500,
-                "temperature": 0,
-                "frequency_penalty": 0,
-                "presence_penalty": 0
-                },
-                "citations": {
-                "style": "none",
-                "url_pattern": "https://vectara.com/documents/{doc.id}",
-                "text_pattern": "{doc.title}"
-                },
-                "enable_factual_consistency_score": True
-            },
-            "chat": {
-                "store": True
-            },
-            "save_history": True,
-            "stream_response": False
-        })
+        payload = self._build_chat_payload(message, corpus_key, max_response_characters=250)
 
         try:
-            response = requests.post(f"{self.BASE_URL}/chats", headers=self._get_headers(), data=payload)
+            response = await self._request("chats", "POST", "/chats", content=payload,
+                                           **self._answer_timeout(deadline))
             response.raise_for_status()
-            response_data = response.json()  
+            response_data = orjson.loads(response.content)  
 
             answer = response_data.get('answer', "No answer available")
             chat_id = response_data.get('chat_id', "No chat id available")
             turn_id = response_data.get('turn_id', "No turn id available")
                 
-            new_chat = Chat(
-                id = chat_id,
-                corpus_key = corpus_key,
-                title = title,
-                created_at = datetime.now()
-            )
-            
-            db.add(new_chat)
-            db.commit()
-            db.refresh(new_chat)
-            
-            new_message = Message(
-                id = turn_id,
-                user_id = message.user_id,
-                chat_id = chat_id,
-                entry = message.entry,
-                answer = answer,
-                tone = message.tone,
-                answer_type = message.answer_type,
-                created_at = datetime.now()
-            )
-            
-            db.add(new_message)
-            db.commit()
-            db.refresh(new_message)
-            
-            return new_message
+            return await blocking_executors.run_db(
+                self._save_new_turn, message, title, corpus_key, chat_id, turn_id, answer, db)
         
         except Exception as e:
+            self._record_answer_deadline_miss("create_chat", e, deadline)
             return {"status": "error", "message": "Failed to create chat", "details": str(e)}
         
     
-    def create_chat(self, message_request: MessageRequest, db: Session):
+    def _save_new_turn(self, message: MessageRequest, title: str, corpus_key: str,
+                       chat_id: str, turn_id: str, answer: str, db: Session) -> Message:
+        new_chat = Chat(
+            id = chat_id,
+            corpus_key = corpus_key,
+            title = title,
+            created_at = datetime.now()
+        )
         
-        # Create corpus
-        corpus_key = self.create_corpus()
+        new_message = Message(
+            id = turn_id,
+            user_id = message.user_id,
+            chat_id = chat_id,
+            entry = message.entry,
+            answer = answer,
+            tone = message.tone,
+            answer_type = message.answer_type,
+            created_at = datetime.now()
+        )
         
-        # Use Groq
-        groq_client = GroqClient()
-        query_data = groq_client.generate_news_query(user_description=message_request.entry)
-        query_content = query_data["query"] 
-        query_language = query_data["language"]
-        
-        # Use Webscrapping
-        google_scraper = GoogleNewsWebScraper()
-        concatenatedGoogle = google_scraper.get_news(query=query_content, language=query_language, max_results=5)
+        # Chat, first message and summary are committed together, the chat row is inserted first
+        with unit_of_work(db):
+            db.add(new_chat)
+            db.add(new_message)
+            ChatSummaries.add_for_new_chat(new_message, db)
+        chat_history_cache.invalidate_message(message.user_id, chat_id)
         
-        bing_scraper = BingNewsWebScraper()
-        concatenatedBing = bing_scraper.get_news(query=query_content, language=query_language, max_results=5)
+        return new_message
+
+    async def create_chat(self, message_request: MessageRequest, db: Session, deadline: Deadline = None):
         
-        # Use Vectara
-        self.index_document(concatenatedBing, query_language, corpus_key)
-        self.index_document(concatenatedGoogle, query_language, corpus_key)
-        message = self.create_new_turn(message_request, query_content, corpus_key, db)
+        # Reuse a topic corpus or take a pooled one, use Groq, Webscrapping and Vectara indexing concurrently
+        topic_refs = []
+        try:
+            pipeline = self._build_sources_pipeline(
+                "create_chat", message_request.entry, corpus_pool.acquire, reuse_topic_corpus=True,
+                source_mode=self._source_mode(message_request), deadline=deadline, topic_refs=topic_refs)
+            results = await pipeline.run()
+            corpus_key = results["corpus"]
+            query_content = results["query"]["query"]
+
+            message = await self.create_new_turn(message_request, query_content, corpus_key, db, deadline)
+        finally:
+            # The chat only shares the corpus for its first turn, its replies move it to a corpus of its own
+            self._release_topic_refs(topic_refs)
         return message
     
-    def create_reply(self, message: MessageTurnRequest, corpus_key: str, db: Session):
+    async def create_reply(self, message: MessageTurnRequest, corpus_key: str, db: Session, deadline: Deadline = None,
+                           source_corpus_keys: list = ()):
         
-        payload = json.dumps({
-            "query": message.entry,
-            "search": {
-                "corpora": [
-                {
-                    "custom_dimensions": {},
-                    "metadata_filter": None,
-                    "lexical_interpolation": 0.025,
-                    "semantics": "default",
-                    "corpus_key": corpus_key
-                }
-                ],
-                "offset": 0,
-                "limit": 10,
-                "context_configuration": {
-                "characters_before": 30,
-                "characters_after": 30,
-                "sentences_before": 3,
-                "sentences_after": 3,
-                "start_tag": "<em>",
-                "end_tag": "</em>"
-                },
-                "reranker": {
-                "type": "customer_reranker",
-                "reranker_name": "Rerank_Multilingual_v1",
-                "limit": 1,
-                "cutoff": 0
-                }
-            },
-            "generation": {
-                "generation_preset_name": "vectara-summary-ext-v1.2.0",
-                "max_used_search_results": 5,
-                "prompt_template": f"""
-                [
-                {{"role": "system", "content": "You are a helpful assistant. You will create a response based on the user's query and the tone provided."}},
-                {{"role": "user", "content": "{message.entry}, with a {message.tone.value} tone."}},
-                {{"role": "assistant", "content": "Generate a response with the specified tone: {message.tone.value}"}}
-                ]
-                """,
-                "max_response_characters": 300,
-                "response_language": "auto",
-                "model_parameters": {
-                "max_tokens": 500,
-                "temperature": 0,
-                "frequency_penalty": 0,
-                "presence_penalty": 0
-                },
-                "citations": {
-                "style": "none",
-                "url_pattern": "https://vectara.com/documents/{doc.id}",
-                "text_pattern": "{doc.title}"
-                },
-                "enable_factual_consistency_score": True
-            },
-            "chat": {
-                "store": True
-            },
-            "save_history": True,
-            "stream_response": False
-        })
+        payload = self._build_chat_payload(message, corpus_key, max_response_characters=300,
+                                           source_corpus_keys=source_corpus_keys)
             
         try:
-            response = requests.post(f"{self.BASE_URL}/chats/{message.chat_id}/turns", headers=self._get_headers(), data=payload)
+            response = await self._request("chats", "POST", f"/chats/{message.chat_id}/turns", content=payload,
+                                           **self._answer_timeout(deadline))
             response.raise_for_status()
-            response_data = response.json()
+            response_data = orjson.loads(response.content)
             answer = response_data.get('answer', "No answer available")
             turn_id = response_data.get('turn_id', "No turn id available")
             
-            new_message = Message(
-                id = turn_id,
-                user_id = message.user_id,
-                chat_id = message.chat_id,
-                entry = message.entry,
-                tone = message.tone,
-                answer = answer,
-                answer_type = message.answer_type,
-                created_at = datetime.now()
-            )
-            
-            db.add(new_message)
-            db.commit()
-            db.refresh(new_message)
-
-            return new_message
+            row = self._reply_row(message, turn_id, answer)
+            return await message_writer.save_reply(
+                row, lambda: blocking_executors.run_db(MessageWriter.write_reply, row, db))
             
         except Exception as e:
+            self._record_answer_deadline_miss("create_index_reply", e, deadline)
             return {"status": "error", "message": "Failed to create reply", "details": str(e)}
 
+    @staticmethod
+    def _reply_row(message: MessageTurnRequest, turn_id: str, answer: str) -> dict:
+        return MessageWriter.build_reply(message.user_id, message.chat_id, message.entry, message.tone,
+                                         message.answer_type, turn_id, answer)
+
     def get_corpus_key_by_chat_id(self, chat_id: str, db: Session):
         try:
             chat = db.query(Chat).filter(Chat.id == chat_id).first()
@@ -361,126 +598,178 @@ class VectaraClient:
         except Exception as e:
             return {"status": "error", "message": "Failed to get corpus key", "details": str(e)}
 
-    def create_index_reply(self, message_request: MessageTurnRequest, db: Session):
+    def _get_reply_corpus_key(self, chat_id: str, db: Session = None):
+        """
+        Returns the corpus key of a chat, its source corpus key and whether other chats
+        may search its corpus.
+        """
+        if db is None:
+            with SessionLocal() as new_db:
+                return self._get_reply_corpus_key(chat_id, new_db)
+
+        try:
+            corpus_key, source_corpus_key = db.query(Chat.corpus_key, Chat.source_corpus_key).filter(
+                Chat.id == chat_id).one()
+        except Exception as e:
+            return {"status": "error", "message": "Failed to get corpus key", "details": str(e)}, None, False
+        return corpus_key, source_corpus_key, TopicCorpusRegistry.is_shared(corpus_key, db)
+
+    @staticmethod
+    def _move_chat_corpus(chat_id: str, corpus_key: str, private_corpus_key: str, db: Session = None) -> bool:
+        """
+        Moves a chat from a shared corpus to its own, keeping the shared one as its source
+        corpus, unless another request already did.
+        :return: Whether the chat was moved.
+        """
+        if db is None:
+            with SessionLocal() as new_db:
+                return VectaraClient._move_chat_corpus(chat_id, corpus_key, private_corpus_key, new_db)
+
+        moved = db.query(Chat).filter(Chat.id == chat_id, Chat.corpus_key == corpus_key).update(
+            {Chat.corpus_key: private_corpus_key, Chat.source_corpus_key: corpus_key}, synchronize_session=False)
+        db.commit()
+        return bool(moved)
+
+    async def _reply_corpus(self, chat_id: str, db: Session = None, source_corpus_keys: list = None):
+        """
+        Corpus stage of the replies. A chat answering from a corpus shared with other chats
+        (a topic corpus) first moves to a pooled corpus of its own, so the sources indexed
+        for its replies never reach the other chats. The shared corpus is still searched,
+        read-only, so replies keep the sources of the first turn: its key is appended to
+        source_corpus_keys.
+        """
+        corpus_key, source_corpus_key, shared = await blocking_executors.run_db(
+            self._get_reply_corpus_key, chat_id, db)
+        if shared:
+            private_corpus_key = await corpus_pool.acquire()
+            moved = await blocking_executors.run_db(self._move_chat_corpus, chat_id, corpus_key, private_corpus_key, db)
+            if moved:
+                corpus_key, source_corpus_key = private_corpus_key, corpus_key
+            else:
+                # A concurrent reply moved the chat first
+                await self.delete_corpus(private_corpus_key)
+                corpus_key, source_corpus_key, _ = await blocking_executors.run_db(
+                    self._get_reply_corpus_key, chat_id, db)
+        if source_corpus_key and source_corpus_keys is not None:
+            source_corpus_keys.append(source_corpus_key)
+        return corpus_key
+
+    async def create_index_reply(self, message_request: MessageTurnRequest, db: Session, deadline: Deadline = None):
+        source_corpus_keys = []
         try:
         
-            corpus_key = self.get_corpus_key_by_chat_id(message_request.chat_id, db)
-            
-            # Use Groq
-            groq_client = GroqClient()
-            query_data = groq_client.generate_news_query(user_description=message_request.entry)
-            query_content = query_data["query"] 
-            query_language = query_data["language"]
-            
-            # Use Webscrapping
-            google_scraper = GoogleNewsWebScraper()
-            concatenatedGoogle = google_scraper.get_news(query=query_content, language=query_language, max_results=5)
-            
-            bing_scraper = BingNewsWebScraper()
-            concatenatedBing = bing_scraper.get_news(query=query_content, language=query_language, max_results=5)
+            # Resolve corpus, use Groq, Webscrapping and Vectara indexing concurrently
+            pipeline = self._build_sources_pipeline(
+                "create_index_reply", message_request.entry,
+                partial(self._reply_corpus, message_request.chat_id, db, source_corpus_keys),
+                source_mode=self._source_mode(message_request), deadline=deadline)
+            results = await pipeline.run()
+            corpus_key = results["corpus"]
             
-            # Use Vectara
-            self.index_document(concatenatedBing, query_language, corpus_key)
-            self.index_document(concatenatedGoogle, query_language, corpus_key)
-            
-            turn = self.create_reply(message_request, corpus_key, db)
+            turn = await self.create_reply(message_request, corpus_key, db, deadline, source_corpus_keys)
             return turn
-        
+
+        except DeadlineExceededError:
+            raise
         except Exception as e:
             return {"status": "error", "message": "Failed to create reply", "details": str(e)}
         
-    def get_chats_by_user_id(self, user_id: int, db: Session):
+    def get_chats_by_user_id(self, user_id: int, db: Session, limit: int = None, cursor: str = None) -> dict:
+        """
+        Retrieves a page of the chats of a user, most recently active first, from the
+        chat summaries maintained when messages are saved.
+
+        Args:
+            user_id (int): The id of the user.
+            db (Session): The database session.
+            limit (int): Optional number of chats per page.
+            cursor (str): Optional cursor returned with the previous page.
+
+        Returns:
+            dict: The chats of the page and the cursor of the next one (None on the last page).
+
+        Raises:
+            InvalidCursorError: If the cursor is not valid.
+        """
+        limit = page_size(limit)
+        after = decode_cursor(cursor)
+        # Range scan of the (user_id, last_message_at, chat_id) index of the summaries
+        query = (
+            db.query(Chat, ChatSummary)
+            .join(ChatSummary, ChatSummary.chat_id == Chat.id)
+            .filter(ChatSummary.user_id == user_id)
+        )
+        if after is not None:
+            query = query.filter(tuple_(ChatSummary.last_message_at, ChatSummary.chat_id) < tuple_(*after))
         try:
-            chats = db.query(Chat).join(Message).filter(Message.user_id == user_id).order_by(Message.created_at.desc()).all()
-            return chats
+            rows = query.order_by(ChatSummary.last_message_at.desc(), ChatSummary.chat_id.desc()) \
+                .limit(limit + 1).all()
         except Exception as e:
-            raise Exception(f"Error al obtener los chats para el usuario {user_id}: {str(e)}")    
-      
+            raise Exception(f"Error al obtener los chats para el usuario {user_id}: {str(e)}")
+
+        chats = [{
+            "id": chat.id,
+            "corpus_key": chat.corpus_key,
+            "title": chat.title,
+            "created_at": chat.created_at,
+            "last_message_at": summary.last_message_at,
+            "message_count": summary.message_count,
+            "last_answer_preview": summary.last_answer_preview,
+        } for chat, summary in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][1].last_message_at, rows[limit - 1][1].chat_id) \
+            if len(rows) > limit else None
+        return {"chats": chats, "next_cursor": next_cursor}
 
-    def get_messages_by_chat_id(self, chat_id: str, db: Session):
+    def get_messages_by_chat_id(self, chat_id: str, db: Session, limit: int = None, cursor: str = None) -> dict:
+        """
+        Retrieves a page of the messages of a chat, oldest first.
+
+        Args:
+            chat_id (str): The id of the chat.
+            db (Session): The database session.
+            limit (int): Optional number of messages per page.
+            cursor (str): Optional cursor returned with the previous page.
+
+        Returns:
+            dict: The messages of the page and the cursor of the next one (None on the last page).
+
+        Raises:
+            InvalidCursorError: If the cursor is not valid.
+        """
+        limit = page_size(limit)
+        after = decode_cursor(cursor)
+        query = db.query(Message).filter(Message.chat_id == chat_id)
+        if after is not None:
+            query = query.filter(tuple_(Message.created_at, Message.id) > tuple_(*after))
         try:
-            messages = db.query(Message).filter(Message.chat_id == chat_id).order_by(Message.created_at.asc()).all()
-            return messages
+            messages = query.order_by(Message.created_at.asc(), Message.id.asc()).limit(limit + 1).all()
         except Exception as e:
             raise Exception(f"Error al obtener los mensajes para el chat {chat_id}: {str(e)}")
-            
-            
-    def create_new_turn_demo(self, message: MessageDemoRequest, corpus_key: str) -> dict:
+
+        next_cursor = encode_cursor(messages[limit - 1].created_at, messages[limit - 1].id) \
+            if len(messages) > limit else None
+        return {"messages": messages[:limit], "next_cursor": next_cursor}
+
+    async def create_new_turn_demo(self, message: MessageDemoRequest, corpus_key: str,
+                                   deadline: Deadline = None) -> dict:
         """
         Creates a new chat demo with the specified MessageDemoRequest and corpus.
 
         Args:
             message (MessageDemoRequest): The message request object.
             corpus_key (str): The key of the corpus.
+            deadline (Deadline): Optional deadline of the request, bounding the generation.
 
         Returns:
             dict: A status dictionary indicating success or error.
         """
-        payload = json.dumps({
-            "query": message.entry,
-            "search": {
-                "corpora": [
-                {
-                    "custom_dimensions": {},
-                    "metadata_filter": None,
-                    "lexical_interpolation": 0.025,
-                    "semantics": "default",
-                    "corpus_key": corpus_key
-                }
-                ],
-                "offset": 0,
-                "limit": 10,
-                "context_configuration": {
-                "characters_before": 30,
-                "characters_after": 30,
-                "sentences_before": 3,
-                "sentences_after": 3,
-                "start_tag": "<em>",
-                "end_tag": "</em>"
-                },
-                "reranker": {
-                "type": "customer_reranker",
-                "reranker_name": "Rerank_Multilingual_v1",
-                "limit": 1,
-                "cutoff": 0
-                }
-            },
-            "generation": {
-                "generation_preset_name": "vectara-summary-ext-v1.2.0",
-                "max_used_search_results": 5,
-                "prompt_template": f"""
-                [
-                {{"role": "system", "content": "You are a helpful assistant. You will create a response based on the user's query and the tone provided."}},
-                {{"role": "user", "content": "{message.entry}, with a {message.tone.value} tone."}},
-                {{"role": "assistant", "content": "Generate a response with the specified tone: {message.tone.value}"}}
-                ]
-                """,
-                "max_response_characters": 250,
-                "response_language": "auto",
-                "model_parameters": {
-                "max_tokens": 500,
-                "temperature": 0,
-                "frequency_penalty": 0,
-                "presence_penalty": 0
-                },
-                "citations": {
-                "style": "none",
-                "url_pattern": "https://vectara.com/documents/{doc.id}",
-                "text_pattern": "{doc.title}"
-                },
-                "enable_factual_consistency_score": True
-            },
-            "chat": {
-                "store": True
-            },
-            "save_history": True,
-            "stream_response": False
-        })
+        payload = self._build_chat_payload(message, corpus_key, max_response_characters=250)
 
         try:
-            response = requests.post(f"{self.BASE_URL}/chats", headers=self._get_headers(), data=payload)
+            response = await self._request("chats", "POST", "/chats", content=payload,
+                                           **self._answer_timeout(deadline))
             response.raise_for_status()
-            response_data = response.json()
+            response_data = orjson.loads(response.content)
             
             answer = response_data.get('answer', "No answer available")
             chat_id = response_data.get('chat_id', "No chat id available")
@@ -498,29 +787,217 @@ class VectaraClient:
             return formatted_response
         
         except Exception as e:
+            self._record_answer_deadline_miss("create_chat_demo", e, deadline)
             return {"status": "error", "message": "Failed to create chat demo", "details": str(e)}
         
         
-    def create_chat_demo(self, message_request: MessageDemoRequest):
-        
-        # Create corpus
-        corpus_key = self.create_corpus()
-        
-        # Use Groq
-        groq_client = GroqClient()
-        query_data = groq_client.generate_news_query(user_description=message_request.entry)
-        query_content = query_data["query"] 
-        query_language = query_data["language"]
+    async def create_chat_demo(self, message_request: MessageDemoRequest, deadline: Deadline = None):
         
-        # Use Webscrapping
-        google_scraper = GoogleNewsWebScraper()
-        concatenatedGoogle = google_scraper.get_news(query=query_content, language=query_language, max_results=5)
-        
-        bing_scraper = BingNewsWebScraper()
-        concatenatedBing = bing_scraper.get_news(query=query_content, language=query_language, max_results=5)
-        
-        # Use Vectara
-        self.index_document(concatenatedBing, query_language, corpus_key)
-        self.index_document(concatenatedGoogle, query_language, corpus_key)
-        message = self.create_new_turn_demo(message_request, corpus_key)
-        return message
\ No newline at end of file
+        # Reuse a topic corpus or take a pooled one, use Groq, Webscrapping and Vectara indexing concurrently
+        topic_refs = []
+        try:
+            pipeline = self._build_sources_pipeline(
+                "create_chat_demo", message_request.entry, corpus_pool.acquire, reuse_topic_corpus=True,
+                source_mode=self._source_mode(message_request, demo=True), deadline=deadline, topic_refs=topic_refs)
+            results = await pipeline.run()
+            corpus_key = results["corpus"]
+
+            message = await self.create_new_turn_demo(message_request, corpus_key, deadline)
+        finally:
+            # Demo chats are not persisted, so they stop using the corpus right away
+            self._release_topic_refs(topic_refs)
+        return message
+    @staticmethod
+    def _describe_stage(stage, result) -> dict:
+        """
+        Builds the progress event sent to streaming clients when a pipeline stage finishes.
+        """
+        event = {"stage": stage.name, "duration_ms": round(stage.duration * 1000, 1)}
+        if stage.deadline_missed:
+            event["deadline_missed"] = True
+        if stage.name == "query":
+            event.update({"status": "query_generated", "query": result["query"], "language": result["language"]})
+        elif stage.name == "topic":
+            event.update({"status": "topic_corpus_reused" if result else "topic_corpus_missed"})
+        elif stage.name == "corpus":
+            event.update({"status": "corpus_ready"})
+        elif stage.name in ("google", "bing"):
+            event.update({"status": "sources_fetched", "articles": len(result or [])})
+        elif stage.name == "dedup":
+            event.update({"status": "deduplicated", **(result["report"] if result else {})})
+        elif stage.name.startswith("index_"):
+            if result is None:
+                event.update({"status": "index_skipped"})
+            elif result.get("status") == "success":
+                event.update({"status": "indexed"})
+            else:
+                event.update({"status": "index_failed", "details": result.get("details")})
+            if result is not None:
+                event.update({"documents": result.get("indexed", 0)})
+        elif stage.name == "enrich":
+            event.update({"status": "enrichment_skipped" if result is None else "enrichment_scheduled",
+                          "articles": result or 0})
+        return event
+
+    async def _run_pipeline_with_progress(self, name: str, user_description: str, corpus_stage,
+                                          reuse_topic_corpus: bool = False,
+                                          source_mode: SourceModeEnum = SourceModeEnum.Full,
+                                          deadline: Deadline = None, topic_refs: list = None):
+        """
+        Runs the sources pipeline, yielding a ("progress", event) tuple as each stage
+        finishes and a final ("results", results) tuple.
+        """
+        events = asyncio.Queue()
+        pipeline = self._build_sources_pipeline(
+            name, user_description, corpus_stage, reuse_topic_corpus=reuse_topic_corpus, source_mode=source_mode,
+            deadline=deadline, topic_refs=topic_refs,
+            on_stage_complete=lambda stage, result: events.put_nowait(self._describe_stage(stage, result)))
+        task = asyncio.ensure_future(pipeline.run())
+
+        try:
+            while not (task.done() and events.empty()):
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield "progress", getter.result()
+                else:
+                    getter.cancel()
+        finally:
+            if not task.done():
+                task.cancel()
+
+        yield "results", task.result()
+
+    async def _stream_generation(self, path: str, payload: str, deadline: Deadline = None):
+        """
+        Sends a streaming chat or turn request and yields the decoded Vectara events.
+        """
+        # Same breaker as the non-streaming chat requests, judged on whether the stream opens
+        breaker = get_upstream("vectara").breaker("chats")
+        breaker.allow()
+        try:
+            async with self.http.stream("POST", path, content=payload, headers={'Accept': 'text/event-stream'},
+                                        **self._answer_timeout(deadline)) as response:
+                raise_for_upstream_status(response)
+                breaker.record_success()
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data:
+                        yield orjson.loads(data)
+        except Exception as e:
+            if is_upstream_failure(e):
+                breaker.record_failure()
+            raise
+        finally:
+            breaker.release()
+
+    async def _stream_answer(self, path: str, payload: str, generation: dict, deadline: Deadline = None):
+        """
+        Yields ("answer", chunk) tuples while filling `generation` with the chat id,
+        turn id and full answer of a streamed generation.
+        """
+        chunks = []
+        async for event in self._stream_generation(path, payload, deadline):
+            event_type = event.get("type")
+            if event_type == "chat_info":
+                generation["chat_id"] = event.get("chat_id", generation.get("chat_id"))
+                generation["turn_id"] = event.get("turn_id", generation.get("turn_id"))
+            elif event_type == "generation_chunk":
+                chunk = event.get("generation_chunk", "")
+                chunks.append(chunk)
+                yield "answer", {"chunk": chunk}
+            elif event_type == "error":
+                raise Exception(f"Vectara streaming error: {event.get('messages')}")
+        generation["answer"] = "".join(chunks) or "No answer available"
+
+    @staticmethod
+    def _serialize_message(message: Message) -> dict:
+        return {
+            "id": message.id,
+            "chat_id": message.chat_id,
+            "entry": message.entry,
+            "answer": message.answer,
+            "tone": message.tone.value,
+            "answer_type": message.answer_type.value,
+            "created_at": message.created_at.isoformat(),
+        }
+
+    def _save_in_new_session(self, save, *args) -> dict:
+        # The request session is closed once a streaming response starts, so streams persist with their own
+        with SessionLocal() as db:
+            return self._serialize_message(save(*args, db))
+
+    async def stream_chat(self, message_request: MessageRequest, deadline: Deadline = None):
+        """
+        Creates a new chat, yielding progress events for each pipeline stage, the answer
+        chunk by chunk and finally the persisted message.
+
+        Args:
+            message_request (MessageRequest): The message request object.
+            deadline (Deadline): Optional deadline of the request.
+
+        Yields:
+            tuple: (event, data) pairs, where event is "progress", "answer" or "done".
+        """
+        topic_refs = []
+        try:
+            async for event, data in self._run_pipeline_with_progress(
+                    "stream_chat", message_request.entry, corpus_pool.acquire, reuse_topic_corpus=True,
+                    source_mode=self._source_mode(message_request), deadline=deadline, topic_refs=topic_refs):
+                if event == "progress":
+                    yield event, data
+                else:
+                    results = data
+            corpus_key = results["corpus"]
+            query_content = results["query"]["query"]
+
+            generation = {}
+            payload = self._build_chat_payload(message_request, corpus_key, max_response_characters=250,
+                                               stream_response=True)
+            async for event, data in self._stream_answer("/chats", payload, generation, deadline):
+                yield event, data
+
+            message = await blocking_executors.run_db(
+                self._save_in_new_session, self._save_new_turn, message_request, query_content, corpus_key,
+                generation.get("chat_id"), generation.get("turn_id"), generation["answer"])
+        finally:
+            self._release_topic_refs(topic_refs)
+        yield "done", message
+
+    async def stream_reply(self, message_request: MessageTurnRequest, deadline: Deadline = None):
+        """
+        Posts a reply to an existing chat, yielding progress events for each pipeline
+        stage, the answer chunk by chunk and finally the persisted message.
+
+        Args:
+            message_request (MessageTurnRequest): The turn request object.
+            deadline (Deadline): Optional deadline of the request.
+
+        Yields:
+            tuple: (event, data) pairs, where event is "progress", "answer" or "done".
+        """
+        source_corpus_keys = []
+        async for event, data in self._run_pipeline_with_progress(
+                "stream_reply", message_request.entry,
+                partial(self._reply_corpus, message_request.chat_id, source_corpus_keys=source_corpus_keys),
+                source_mode=self._source_mode(message_request), deadline=deadline):
+            if event == "progress":
+                yield event, data
+            else:
+                results = data
+        corpus_key = results["corpus"]
+
+        generation = {}
+        payload = self._build_chat_payload(message_request, corpus_key, max_response_characters=300,
+                                           stream_response=True, source_corpus_keys=source_corpus_keys)
+        async for event, data in self._stream_answer(f"/chats/{message_request.chat_id}/turns", payload, generation,
+                                                     deadline):
+            yield event, data
+
+        row = self._reply_row(message_request, generation.get("turn_id"), generation["answer"])
+        message = await message_writer.save_reply(
+            row, lambda: blocking_executors.run_db(MessageWriter.write_reply, row))
+        yield "done", self._serialize_message(message)
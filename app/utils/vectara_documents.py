@@ -0,0 +1,93 @@
+import hashlib
+import os
+import re
+from typing import List, Optional
+
+MAX_PART_CHARACTERS = int(os.getenv("VECTARA_MAX_PART_CHARACTERS", 2000))
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。！？])\s+")
+
+
+def document_id_for_url(url: str, prefix: str = "art-") -> str:
+    """
+    Derives a stable Vectara document id from an article URL, so uploading the same
+    article twice targets the same document.
+    """
+    return prefix + hashlib.sha256(url.encode("utf-8")).hexdigest()[:40]
+
+
+def _split_long_text(text: str, max_characters: int) -> List[str]:
+    pieces, current = [], ""
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        while len(sentence) > max_characters:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_characters])
+            sentence = sentence[max_characters:]
+        if current and len(current) + 1 + len(sentence) > max_characters:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_parts(body: str, max_characters: int = MAX_PART_CHARACTERS) -> List[str]:
+    """
+    Splits an article body into parts of at most max_characters, packing whole
+    paragraphs together and only splitting paragraphs that are too long on their own.
+    """
+    parts, current = [], ""
+    for paragraph in (line.strip() for line in body.split("\n")):
+        if not paragraph:
+            continue
+        if len(paragraph) > max_characters:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.extend(_split_long_text(paragraph, max_characters))
+            continue
+        if current and len(current) + 1 + len(paragraph) > max_characters:
+            parts.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        parts.append(current)
+    return parts
+
+
+def build_article_document(article: dict, lang: str, source: str = None) -> Optional[dict]:
+    """
+    Builds a Vectara core document for a scraped article.
+    :param article: Dictionary with the header, body and link of the article. Articles built
+        from search snippets are flagged with "snippet", so the full page can be indexed later.
+    :param lang: Language of the article.
+    :param source: (Optional) Name of the search engine the article was found with.
+    :return: The document, or None if the article has no body to index.
+    """
+    link = article.get("link")
+    body = article.get("body") or ""
+    if not link or not body.strip():
+        return None
+
+    title = article.get("header") or link
+    metadata = {"title": title, "url": link, "lang": lang}
+    if source:
+        metadata["source"] = source
+
+    return {
+        "id": document_id_for_url(link, prefix="snp-" if article.get("snippet") else "art-"),
+        "type": "core",
+        "metadata": metadata,
+        "document_parts": [
+            {
+                "text": text,
+                "metadata": {"title": title, "url": link, "part": index},
+            }
+            for index, text in enumerate(split_into_parts(body))
+        ]
+    }
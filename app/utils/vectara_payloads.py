@@ -0,0 +1,121 @@
+import os
+from functools import lru_cache
+from typing import Iterable
+
+import orjson
+
+from app.enums.answer_type_enum import AnswerTypeEnum
+from app.enums.message_tone_enum import MessageToneEnum
+
+GENERATION_PRESET_NAME = "vectara-summary-ext-v1.2.0"
+MAX_TOKENS = int(os.getenv("VECTARA_MAX_TOKENS", 500))
+
+# Limits of the generated answer per answer type, on top of the ones of each endpoint.
+# Short formats request fewer tokens and characters, so their generation finishes sooner.
+ANSWER_TYPE_LIMITS = {
+    AnswerTypeEnum.Text: {},
+    AnswerTypeEnum.Video: {},
+    AnswerTypeEnum.Post: {"max_tokens": 200, "max_response_characters": 220},
+    AnswerTypeEnum.Meme: {"max_tokens": 60, "max_response_characters": 120},
+}
+
+# Rendered by Vectara with the query escaped for a JSON string, so the user text
+# is never part of the template itself
+QUERY_REFERENCE = "$esc.java(${vectaraQuery})"
+
+
+def _fragment(value) -> orjson.Fragment:
+    return orjson.Fragment(orjson.dumps(value))
+
+
+CORPUS_SETTINGS = {
+    "custom_dimensions": {},
+    "metadata_filter": None,
+    "lexical_interpolation": 0.025,
+    "semantics": "default",
+}
+CONTEXT_CONFIGURATION = _fragment({
+    "characters_before": 30,
+    "characters_after": 30,
+    "sentences_before": 3,
+    "sentences_after": 3,
+    "start_tag": "<em>",
+    "end_tag": "</em>"
+})
+RERANKER = _fragment({
+    "type": "customer_reranker",
+    "reranker_name": "Rerank_Multilingual_v1",
+    "limit": 1,
+    "cutoff": 0
+})
+CITATIONS = {
+    "style": "none",
+    "url_pattern": "https://vectara.com/documents/{doc.id}",
+    "text_pattern": "{doc.title}"
+}
+CHAT = _fragment({"store": True})
+
+
+def build_prompt_template(tone: MessageToneEnum) -> str:
+    """
+    Builds the prompt template of a tone by serializing the messages, so the template
+    is always a valid JSON array whatever the query contains.
+    """
+    return orjson.dumps([
+        {"role": "system", "content": "You are a helpful assistant. You will create a response based on the user's query and the tone provided."},
+        {"role": "user", "content": f"{QUERY_REFERENCE}, with a {tone.value} tone."},
+        {"role": "assistant", "content": f"Generate a response with the specified tone: {tone.value}"}
+    ]).decode()
+
+
+@lru_cache(maxsize=None)
+def _generation(tone: MessageToneEnum, answer_type: AnswerTypeEnum, max_response_characters: int) -> orjson.Fragment:
+    # Only depends on enums and the endpoint limit, so each combination is serialized once
+    limits = ANSWER_TYPE_LIMITS.get(answer_type, {})
+    return _fragment({
+        "generation_preset_name": GENERATION_PRESET_NAME,
+        "max_used_search_results": 5,
+        "prompt_template": build_prompt_template(tone),
+        "max_response_characters": min(max_response_characters,
+                                       limits.get("max_response_characters", max_response_characters)),
+        "response_language": "auto",
+        "model_parameters": {
+            "max_tokens": limits.get("max_tokens", MAX_TOKENS),
+            "temperature": 0,
+            "frequency_penalty": 0,
+            "presence_penalty": 0
+        },
+        "citations": CITATIONS,
+        "enable_factual_consistency_score": True
+    })
+
+
+def build_chat_payload(query: str, corpus_key: str, tone: MessageToneEnum, answer_type: AnswerTypeEnum,
+                       max_response_characters: int, stream_response: bool = False,
+                       source_corpus_keys: Iterable[str] = ()) -> bytes:
+    """
+    Builds the body of a Vectara chat or turn request. Everything but the query and
+    the corpus key is serialized ahead of time.
+    :param query: The user entry.
+    :param corpus_key: The key of the corpus to search.
+    :param tone: Tone of the answer, selecting the prompt template.
+    :param answer_type: Type of the answer, selecting the generation limits.
+    :param max_response_characters: Maximum length of the answer allowed by the endpoint.
+    :param stream_response: Whether Vectara should stream the answer as server-sent events.
+    :param source_corpus_keys: Other corpora searched along with corpus_key (e.g., the topic corpus of the first turn).
+    :return: The serialized payload.
+    """
+    return orjson.dumps({
+        "query": query,
+        "search": {
+            "corpora": [{**CORPUS_SETTINGS, "corpus_key": key} for key in (corpus_key, *source_corpus_keys)],
+            "offset": 0,
+            "limit": 10,
+            "context_configuration": CONTEXT_CONFIGURATION,
+            "reranker": RERANKER
+        },
+        "generation": _generation(tone, answer_type, max_response_characters),
+        "chat": CHAT,
+        "save_history": True,
+        "stream_response": stream_response
+    })
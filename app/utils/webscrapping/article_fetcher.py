@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+from urllib.parse import urlparse
+
+import httpx
+
+from app.utils.webscrapping.serpapi_web_scraper import SerpApiWebScraper
+
+
+class ArticleFetcher:
+    """
+    Fetches news article pages concurrently with a global concurrency cap, a per-host
+    cap and per-request timeouts. Articles that are not ready before the deadline are
+    left out of the result instead of holding up the caller.
+    """
+
+    MAX_CONCURRENCY = int(os.getenv("ARTICLE_FETCH_MAX_CONCURRENCY", 16))
+    MAX_PER_HOST = int(os.getenv("ARTICLE_FETCH_MAX_PER_HOST", 2))
+    CONNECT_TIMEOUT = float(os.getenv("ARTICLE_FETCH_CONNECT_TIMEOUT", 3.05))
+    READ_TIMEOUT = float(os.getenv("ARTICLE_FETCH_READ_TIMEOUT", 5))
+    DEADLINE = float(os.getenv("ARTICLE_FETCH_DEADLINE", 8))
+
+    # Shared by every fetcher so the caps hold across concurrent chats
+    _semaphore = None
+    _host_semaphores = {}
+
+    @classmethod
+    def _get_semaphore(cls) -> asyncio.Semaphore:
+        if cls._semaphore is None:
+            cls._semaphore = asyncio.Semaphore(cls.MAX_CONCURRENCY)
+        return cls._semaphore
+
+    @classmethod
+    def _get_host_semaphore(cls, host: str) -> asyncio.Semaphore:
+        semaphore = cls._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(cls.MAX_PER_HOST)
+            cls._host_semaphores[host] = semaphore
+        return semaphore
+
+    @classmethod
+    async def _fetch(cls, url: str):
+        timeout = httpx.Timeout(cls.READ_TIMEOUT, connect=cls.CONNECT_TIMEOUT)
+        async with cls._get_host_semaphore(urlparse(url).netloc.lower()):
+            async with cls._get_semaphore():
+                return await SerpApiWebScraper.extract_news_content(url, timeout=timeout)
+
+    @classmethod
+    async def iter_articles(cls, urls: list, deadline: float = None, stop: asyncio.Event = None):
+        """
+        Fetch several articles concurrently, yielding each one as soon as it is extracted.
+        Fetches still pending when the deadline passes, when `stop` is set or when the
+        caller stops iterating are cancelled.
+        :param urls: URLs of the news articles.
+        :param deadline: (Optional) Seconds to wait for the articles. Defaults to ARTICLE_FETCH_DEADLINE.
+        :param stop: (Optional) Event stopping the collection when set.
+        :return: Async iterator of (url, content) tuples, in completion order.
+        """
+        deadline = cls.DEADLINE if deadline is None else deadline
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + deadline
+
+        tasks = {asyncio.ensure_future(cls._fetch(url)): url for url in dict.fromkeys(urls) if url}
+        pending = set(tasks)
+        stop_waiter = asyncio.ensure_future(stop.wait()) if stop is not None else None
+
+        try:
+            while pending:
+                timeout = deadline_at - loop.time()
+                if timeout <= 0:
+                    print(f"Article fetch deadline of {deadline:.1f}s reached, skipping {len(pending)} article(s)")
+                    break
+                waiting = pending | {stop_waiter} if stop_waiter is not None else pending
+                done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                pending -= done
+                for task in done:
+                    if task is stop_waiter:
+                        continue
+                    content = task.result()
+                    if content:
+                        yield tasks[task], content
+                if stop_waiter is not None and stop_waiter.done():
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if stop_waiter is not None:
+                stop_waiter.cancel()
+
+    @classmethod
+    async def fetch_all(cls, urls: list, deadline: float = None) -> dict:
+        """
+        Fetch and extract the content of several articles concurrently.
+        :param urls: URLs of the news articles.
+        :param deadline: (Optional) Seconds to wait for the articles. Defaults to ARTICLE_FETCH_DEADLINE.
+        :return: Dictionary mapping each URL finished before the deadline to its header and body content.
+        """
+        return {url: content async for url, content in cls.iter_articles(urls, deadline)}
+
+    @classmethod
+    async def collect(cls, urls: list, budget: "ContentBudget" = None) -> list:
+        """
+        Fetch articles until the content budget is met, cancelling the remaining fetches.
+        :param urls: URLs of the news articles.
+        :param budget: (Optional) Budget shared with the other sources of the same chat. Without one,
+            every article finished before ARTICLE_FETCH_DEADLINE is returned.
+        :return: List of dictionaries with the header, body and link of each article, in completion order.
+        """
+        if budget is None:
+            budget = ContentBudget(max_characters=float("inf"), max_articles=float("inf"))
+        budget.start()
+
+        articles_data = []
+        if budget.exhausted:
+            return articles_data
+
+        articles = cls.iter_articles(urls, deadline=budget.remaining_time(), stop=budget.reached)
+        try:
+            async for url, content in articles:
+                # Failed fetches come back with an empty body, they add nothing to index
+                if not content.get("body"):
+                    continue
+                articles_data.append({"header": content["header"], "body": content["body"], "link": url})
+                budget.add(content["body"])
+                if budget.exhausted:
+                    break
+        finally:
+            await articles.aclose()
+        return articles_data
+
+
+class ContentBudget:
+    """
+    How much article text is enough for a chat. Sources sharing a budget stop
+    collecting once together they have MAX_CHARACTERS of text or MAX_ARTICLES
+    articles, or once the deadline passes, whichever comes first.
+    """
+
+    MAX_CHARACTERS = int(os.getenv("SOURCE_BUDGET_MAX_CHARACTERS", 15000))
+    MAX_ARTICLES = int(os.getenv("SOURCE_BUDGET_MAX_ARTICLES", 6))
+
+    def __init__(self, max_characters: int = None, max_articles: int = None, deadline: float = None):
+        self.max_characters = self.MAX_CHARACTERS if max_characters is None else max_characters
+        self.max_articles = self.MAX_ARTICLES if max_articles is None else max_articles
+        self.deadline = ArticleFetcher.DEADLINE if deadline is None else deadline
+        self.characters = 0
+        self.articles = 0
+        self.reached = asyncio.Event()
+        self._deadline_at = None
+        self._cap_at = None
+
+    def start(self):
+        # The deadline runs from the first fetch, not from when the pipeline was built
+        if self._deadline_at is None:
+            self._deadline_at = time.monotonic() + self.deadline
+
+    def cap(self, seconds: float):
+        """
+        Stops the collection within `seconds` from now at the latest, e.g., to stay
+        within the request deadline, returning the articles fetched so far.
+        """
+        cap_at = time.monotonic() + seconds
+        self._cap_at = cap_at if self._cap_at is None else min(self._cap_at, cap_at)
+
+    def remaining_time(self) -> float:
+        self.start()
+        deadline_at = self._deadline_at if self._cap_at is None else min(self._deadline_at, self._cap_at)
+        return max(0.0, deadline_at - time.monotonic())
+
+    def add(self, body: str):
+        self.characters += len(body)
+        self.articles += 1
+        if self.characters >= self.max_characters or self.articles >= self.max_articles:
+            self.reached.set()
+
+    @property
+    def exhausted(self) -> bool:
+        return self.reached.is_set() or self.remaining_time() <= 0
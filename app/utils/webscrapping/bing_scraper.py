@@ -1,5 +1,5 @@
-import os
-from serpapi import GoogleSearch
+from app.enums.source_mode_enum import SourceModeEnum
+from app.utils.webscrapping.article_fetcher import ArticleFetcher
 from app.utils.webscrapping.serpapi_web_scraper import SerpApiWebScraper
 
 
@@ -8,35 +8,38 @@ class BingNewsWebScraper(SerpApiWebScraper):
     A class to fetch and process Bing News content using the SerpAPI Bing News Engine.
     """
 
-    def get_news(self, query, language="en", max_results=10):
+    async def get_news(self, query, language="en", max_results=10, budget=None, mode=SourceModeEnum.Full,
+                       deadline=None):
         """
         Fetch news articles based on the query.
         :param query: Search term for news articles.
         :param language: Language for the results.
         :param max_results: Maximum number of results to fetch.
-        :return: Concatenated string of headers and bodies.
+        :param budget: (Optional) ContentBudget to stop fetching once enough content is collected.
+        :param mode: Full downloads the article pages, Snippets and Hybrid only use the search snippets
+            (the caller enriches Hybrid results with the full pages later).
+        :param deadline: (Optional) Deadline of the request, bounding the search.
+        :return: List of dictionaries with the header, body and link of each article.
         """
         params = {
             "engine": "bing_news",
             "q": query,
             "cc": language,  # Language or region code
-            "api_key": self.api_key,
         }
 
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        try:
+            articles = await self.search_news(params, "organic_results", language, max_results, deadline)
+        except Exception as e:
+            print(f"Error fetching news results: {e}")
+            return []
 
-        if "organic_results" not in results:
+        if not articles:
             print(f"No organic results found for query: {query}")
-            return ""
+            return []
 
-        articles = results["organic_results"][:max_results]
+        if mode != SourceModeEnum.Full:
+            return self.snippet_articles(articles)
 
-        # Fetch and concatenate headers and bodies
-        concatenated_content = ""
-        for article in articles:
-            link = article.get("link")
-            content = self.extract_news_content(link)
-            concatenated_content += f"{content['header']} {content['body']} "
-
-        return concatenated_content.strip()
\ No newline at end of file
+        # Fetch the articles concurrently, as they finish and only until the budget is met
+        links = [article.get("link") for article in articles if article.get("link")]
+        return await ArticleFetcher.collect(links, budget)
@@ -1,4 +1,5 @@
-from serpapi import GoogleSearch
+from app.enums.source_mode_enum import SourceModeEnum
+from app.utils.webscrapping.article_fetcher import ArticleFetcher
 from app.utils.webscrapping.serpapi_web_scraper import SerpApiWebScraper
 
 class GoogleNewsWebScraper(SerpApiWebScraper):
@@ -7,47 +8,39 @@ class GoogleNewsWebScraper(SerpApiWebScraper):
         :param query: Search query string.
         :param language: Language for the results.
         :param max_results: Maximum number of results to fetch.
-        :return: Concatenated string of headers and bodies.
+        :param budget: (Optional) ContentBudget to stop fetching once enough content is collected.
+        :param mode: Full downloads the article pages, Snippets and Hybrid only use the search snippets
+            (the caller enriches Hybrid results with the full pages later).
+        :param deadline: (Optional) Deadline of the request, bounding the search.
+        :return: List of dictionaries with the header, body and link of each article.
     """
 
-    def get_news(self, query, language="en", max_results=5):
+    async def get_news(self, query, language="en", max_results=5, budget=None, mode=SourceModeEnum.Full,
+                       deadline=None):
         params = {
             "engine": "google",
             "q": query,
             "tbm": "nws",
             "hl": language,
-            "api_key": self.api_key,
         }
 
         try:
-            search = GoogleSearch(params)
-            results = search.get_dict()
+            articles = await self.search_news(params, "news_results", language, max_results, deadline)
         except Exception as e:
             print(f"Error fetching news results: {e}")
             return []
 
-        if "news_results" not in results:
+        if not articles:
             print(f"No news results found for query in Google: {query}")
             return []
 
-        articles = results["news_results"][:max_results]
-        articles_data = []
+        if mode != SourceModeEnum.Full:
+            return self.snippet_articles(articles)
 
         for article in articles:
-            try:
-                link = article.get("link")
-                if not link:
-                    print(f"Missing link for article: {article}")
-                    continue
-                content = self.extract_news_content(link)
-                if content and 'header' in content and 'body' in content:
-                    articles_data.append({
-                        "header": content["header"],
-                        "body": content["body"],
-                        "link": link
-                    })
-            except Exception as e:
-                print(f"Error processing article: {e}")
-                continue
+            if not article.get("link"):
+                print(f"Missing link for article: {article}")
 
-        return articles_data
\ No newline at end of file
+        # Fetch the articles concurrently, as they finish and only until the budget is met
+        links = [article.get("link") for article in articles if article.get("link")]
+        return await ArticleFetcher.collect(links, budget)
@@ -0,0 +1,152 @@
+import os
+import re
+
+import httpx
+from lxml import etree, html as lxml_html
+
+MAX_BYTES = int(os.getenv("ARTICLE_MAX_BYTES", 2 * 1024 * 1024))
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Containers holding the main article, most specific first
+ARTICLE_XPATHS = [etree.XPath(expression) for expression in [
+    "//*[@itemprop='articleBody']",
+    "//article",
+    "//*[@role='main']",
+    "//main",
+    "//*[@id='article-body']",
+    f"//*[{_has_class('article-body')} or {_has_class('story-body')} or "
+    f"{_has_class('post-content')} or {_has_class('entry-content')}]",
+]]
+
+# Tags that never hold article text
+# (not form: some sites wrap the whole page in one)
+SKIPPED_TAGS = ("script", "style", "noscript", "template", "iframe", "svg", "nav", "footer", "aside")
+
+# Blocks around the article, recognized by a whole class token or their id, so that
+# e.g. "commentary-body" or "has-sidebar" are kept
+SKIPPED_BLOCK_NAMES = (
+    "comment|comments|disqus|footer|navbar|menu|breadcrumb|breadcrumbs|related|related-articles|"
+    "recommended|share|social|newsletter|subscribe|promo|advert|advertisement|sponsored|cookie|"
+    "cookies|popup|modal|sidebar"
+)
+SKIPPED_BLOCKS_XPATH = etree.XPath(
+    f".//*[re:test(@class, '(^|\\s)({SKIPPED_BLOCK_NAMES})(\\s|$)', 'i') or "
+    f"re:test(@id, '^({SKIPPED_BLOCK_NAMES})$', 'i')]",
+    namespaces={"re": "http://exslt.org/regular-expressions"},
+)
+PARAGRAPHS_XPATH = etree.XPath(".//p")
+WHITESPACE = re.compile(r"\s+")
+
+
+class UnsupportedContentError(Exception):
+    """
+    Raised when a page is not HTML and cannot be extracted.
+    """
+
+
+async def fetch_html(client: httpx.AsyncClient, url: str, timeout=None, max_bytes: int = MAX_BYTES) -> tuple:
+    """
+    Downloads a page as a stream, stopping at max_bytes.
+    :param client: The HTTP client to use.
+    :param url: URL of the page.
+    :param timeout: (Optional) httpx.Timeout for the request. Defaults to the client timeout.
+    :param max_bytes: Maximum number of bytes read from the body.
+    :return: Tuple with the (possibly truncated) body and the declared charset, if any.
+    """
+    request_options = {} if timeout is None else {"timeout": timeout}
+    async with client.stream("GET", url, **request_options) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            raise UnsupportedContentError(f"Unsupported content type '{content_type}' for {url}")
+
+        chunks, size = [], 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                break
+        return b"".join(chunks)[:max_bytes], response.charset_encoding
+
+
+def _parser(encoding: str = None):
+    try:
+        return lxml_html.HTMLParser(encoding=encoding, remove_comments=True)
+    except LookupError:
+        # Servers declare charset aliases libxml2 does not know, let it sniff the page instead
+        return lxml_html.HTMLParser(remove_comments=True)
+
+
+def _parse(html, encoding: str = None):
+    if isinstance(html, bytes):
+        return lxml_html.document_fromstring(html, parser=_parser(encoding))
+    return lxml_html.document_fromstring(html, parser=_parser())
+
+
+def _text(element) -> str:
+    return WHITESPACE.sub(" ", element.text_content()).strip()
+
+
+def _remove_boilerplate(container):
+    for element in list(container.iter(*SKIPPED_TAGS)):
+        element.drop_tree()
+    for element in SKIPPED_BLOCKS_XPATH(container):
+        # Nested matches are already gone with their ancestor
+        if element.getparent() is not None:
+            element.drop_tree()
+
+
+def _find_container(document):
+    for xpath in ARTICLE_XPATHS:
+        candidates = xpath(document)
+        if candidates:
+            # Pages sometimes have several matches (e.g., teaser articles), keep the one with most paragraphs
+            return max(candidates, key=lambda candidate: len(PARAGRAPHS_XPATH(candidate)))
+    body = document.find("body")
+    return body if body is not None else document
+
+
+def _find_header(document, container) -> str:
+    for header in (container.find(".//h1"), document.find(".//h1")):
+        if header is not None and _text(header):
+            return _text(header)
+    og_titles = document.xpath("//meta[@property='og:title']/@content")
+    if og_titles and og_titles[0].strip():
+        return og_titles[0].strip()
+    title = document.find(".//title")
+    if title is not None and _text(title):
+        return _text(title)
+    return "No title found"
+
+
+def extract_article(html, encoding: str = None) -> dict:
+    """
+    Extracts the title and the paragraphs of the main article of a page, skipping
+    navigation, footers, comments and other blocks around it.
+    :param html: The page, as bytes or text.
+    :param encoding: (Optional) Charset declared by the server, used when html is bytes.
+    :return: Dictionary containing header and body content.
+    """
+    try:
+        document = _parse(html, encoding)
+    except etree.ParserError:
+        return {"header": "No title found", "body": ""}
+
+    container = _find_container(document)
+    header_text = _find_header(document, container)
+
+    all_paragraphs = PARAGRAPHS_XPATH(container)
+    _remove_boilerplate(container)
+    paragraphs = [text for text in (_text(p) for p in PARAGRAPHS_XPATH(container)) if text]
+    if not paragraphs:
+        # Stripping took everything, the markup is unusual rather than the page empty.
+        # Dropped paragraphs still hold their text once detached.
+        paragraphs = [text for text in (_text(p) for p in all_paragraphs) if text]
+    body_text = "\n".join(paragraphs)
+
+    return {"header": header_text, "body": body_text}
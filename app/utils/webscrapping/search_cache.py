@@ -0,0 +1,137 @@
+import asyncio
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from app.utils.cache import LRUCache, register_cache
+
+
+class SearchResultCache:
+    """
+    Cache for SerpAPI search results with a freshness window and a stale-while-revalidate
+    window. Concurrent lookups of the same key share a single upstream call.
+    """
+
+    def __init__(self, name: str, fresh_ttl: float, stale_ttl: float, max_bytes: int):
+        """
+        :param name: Name of the cache, used in the metrics.
+        :param fresh_ttl: Seconds during which a result is served without refreshing it.
+        :param stale_ttl: Extra seconds during which a result is still served while it is refreshed in the background.
+        :param max_bytes: Maximum total size of the cached results.
+        """
+        self.name = name
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.entries = LRUCache(name, max_bytes, ttl=fresh_ttl + stale_ttl)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background_tasks = set()
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.refreshes = 0
+        register_cache(self)
+
+    @staticmethod
+    def make_key(engine: str, query: str, language: str, max_results: int) -> str:
+        """
+        Builds the cache key from the normalized engine, query, language and result count.
+        """
+        normalized_query = re.sub(r"\s+", " ", query or "").strip().casefold()
+        return "|".join([engine.lower(), (language or "").lower(), str(max_results), normalized_query])
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs the upstream call for a key, sharing it with every concurrent caller.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.collapsed += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only the shared future was cancelled (its leader was, e.g., by a stage deadline),
+                # not this caller: run the call again instead of failing a request nobody cancelled
+                if not future.cancelled():
+                    raise
+                return await self._fetch(key, fetch)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+            self.entries.set(key, (value, time.time()))
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting for it
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Awaitable[Any]]):
+        if key in self._inflight:
+            return
+        self.refreshes += 1
+
+        async def refresh():
+            try:
+                await self._fetch(key, fetch)
+            except Exception as e:
+                print(f"Error refreshing search results for {key}: {e}")
+
+        task = asyncio.ensure_future(refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached results for a key, fetching them when missing or expired.
+        :param key: Key built with make_key.
+        :param fetch: Coroutine function performing the upstream search.
+        :return: The search results.
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < self.fresh_ttl:
+                self.fresh_hits += 1
+                return value
+            self.stale_hits += 1
+            self._refresh_in_background(key, fetch)
+            return value
+
+        self.misses += 1
+        return await self._fetch(key, fetch)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.fresh_hits + self.stale_hits + self.misses
+        entries = self.entries.stats()
+        return {
+            "entries": entries["entries"],
+            "bytes": entries["bytes"],
+            "max_bytes": entries["max_bytes"],
+            "evictions": entries["evictions"],
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.fresh_hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "collapsed": self.collapsed,
+            "refreshes": self.refreshes,
+            "inflight": len(self._inflight),
+        }
+
+
+search_cache = SearchResultCache(
+    "search_results",
+    fresh_ttl=float(os.getenv("SEARCH_CACHE_FRESH_TTL", 5 * 60)),
+    stale_ttl=float(os.getenv("SEARCH_CACHE_STALE_TTL", 30 * 60)),
+    max_bytes=int(os.getenv("SEARCH_CACHE_MAX_BYTES", 8 * 1024 * 1024)),
+)
@@ -1,7 +1,24 @@
 import os
-import requests
+import httpx
 from abc import ABC, abstractmethod
-from bs4 import BeautifulSoup
+from urllib.parse import urldefrag
+
+from app.utils.cache import TieredCache
+from app.utils.deadline import timeout_options
+from app.utils.executors import blocking_executors
+from app.utils.http_clients import upstream_clients
+from app.utils.resilience import get_upstream
+from app.utils.webscrapping.html_extractor import UnsupportedContentError, extract_article, fetch_html
+from app.utils.webscrapping.search_cache import search_cache
+
+# Extracted article content, shared across chats and replies
+article_cache = TieredCache(
+    "article_content",
+    max_bytes=int(os.getenv("ARTICLE_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    ttl=float(os.getenv("ARTICLE_CACHE_TTL", 6 * 60 * 60)),
+    disk_path=os.getenv("ARTICLE_CACHE_PATH"),
+    disk_max_bytes=int(os.getenv("ARTICLE_CACHE_DISK_MAX_BYTES", 512 * 1024 * 1024)),
+)
 
 
 class SerpApiWebScraper(ABC):
@@ -19,40 +36,112 @@ class SerpApiWebScraper(ABC):
             raise ValueError("API Key is required. Provide it as a parameter or set it in the environment variables.")
 
     @abstractmethod
-    def get_news(self, query, language="en"):
+    async def get_news(self, query, language="en"):
         """
         Fetch news articles based on a query.
         :param query: Search query string.
         :param language: Language for the results.
-        :return: Concatenated string of headers and bodies.
+        :return: List of dictionaries with the header, body and link of each article.
         """
         pass
 
+    async def search(self, params, deadline=None):
+        """
+        Run a search against the SerpAPI JSON endpoint on the shared connection pool.
+        Searches are hedged: when SerpAPI is slower than usual a second identical request
+        is sent and the first answer wins. Failed searches are retried within the retry budget.
+        :param params: SerpAPI search parameters, without the API key.
+        :param deadline: (Optional) Deadline of the request, bounding the call.
+        :return: Dictionary with the search results.
+        """
+        async def request():
+            response = await upstream_clients.get_serpapi().get(
+                "/search.json", params={**params, "api_key": self.api_key, "output": "json"},
+                **timeout_options(deadline))
+            response.raise_for_status()
+            return response.json()
+
+        return await get_upstream("serpapi").hedged_call("search", request, deadline=deadline)
+
+    async def search_news(self, params, results_key, language, max_results, deadline=None):
+        """
+        Run a news search through the search result cache.
+        :param params: SerpAPI search parameters, without the API key.
+        :param results_key: Key of the results list in the SerpAPI response.
+        :param language: Language for the results, part of the cache key.
+        :param max_results: Maximum number of results to return, part of the cache key.
+        :param deadline: (Optional) Deadline of the request, bounding the search when it is not cached.
+        :return: List with at most max_results search results.
+        """
+        async def fetch():
+            results = await self.search(params, deadline)
+            return results.get(results_key, [])[:max_results]
+
+        key = search_cache.make_key(params["engine"], params["q"], language, max_results)
+        return await search_cache.get_or_fetch(key, fetch)
+
     @staticmethod
-    def extract_news_content(url):
+    def snippet_articles(results):
+        """
+        Build articles from the title, snippet, source and date of the search results,
+        without downloading the article pages.
+        :param results: SerpAPI news results.
+        :return: List of dictionaries with the header, body and link of each article.
+        """
+        articles_data = []
+        for result in results:
+            link = result.get("link")
+            snippet = result.get("snippet")
+            if not link or not snippet:
+                continue
+
+            source = result.get("source")
+            if isinstance(source, dict):
+                source = source.get("name")
+            # A single paragraph, so deduplication does not strip the source as boilerplate
+            attribution = ", ".join(value for value in (source, result.get("date")) if value)
+            body = f"{snippet} ({attribution})" if attribution else snippet
+
+            articles_data.append({
+                "header": result.get("title") or "No title found",
+                "body": body,
+                "link": link,
+                "snippet": True
+            })
+        return articles_data
+
+    @staticmethod
+    async def _run_cache(operation, *args):
+        # The disk tier is SQLite file I/O, only the in-memory tier is cheap enough for the event loop
+        if article_cache.disk is None:
+            return operation(*args)
+        return await blocking_executors.run_cpu(operation, *args)
+
+    @staticmethod
+    async def extract_news_content(url, timeout=None):
         """
         Extract the header and body content from a news article page.
         :param url: URL of the news article.
+        :param timeout: (Optional) httpx.Timeout for the request. Defaults to the pool timeout.
         :return: Dictionary containing header and body content.
         """
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Attempt to extract the title (header) and body
-            header = soup.find('h1')  # Most news pages use <h1> for the main title
-            body = soup.find_all('p')  # Body paragraphs are usually in <p> tags
+        cache_key = urldefrag(url).url
+        cached = await SerpApiWebScraper._run_cache(article_cache.get, cache_key)
+        if cached is not None:
+            return cached
 
-            # Convert extracted content to strings
-            header_text = header.get_text(strip=True) if header else "No title found"
-            body_text = "\n".join(p.get_text(strip=True) for p in body if p.get_text(strip=True))
-
-            return {"header": header_text, "body": body_text}
-        except requests.RequestException as e:
+        try:
+            html, encoding = await fetch_html(upstream_clients.get_articles(), url, timeout=timeout)
+            # Parsing a page of up to ARTICLE_MAX_BYTES is CPU-bound, keep it off the event loop
+            content = await blocking_executors.run_cpu(extract_article, html, encoding)
+            await SerpApiWebScraper._run_cache(article_cache.set, cache_key, content)
+            return content
+        except UnsupportedContentError as e:
+            print(f"Skipping the article: {e}")
+            return {"header": "Unsupported content type", "body": ""}
+        except httpx.HTTPError as e:
             print(f"Failed to fetch the article: {e}")
             return {"header": "Error fetching article", "body": ""}
         except Exception as e:
             print(f"An error occurred during content extraction: {e}")
             return {"header": "Error extracting content", "body": ""}
-
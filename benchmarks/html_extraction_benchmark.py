@@ -0,0 +1,86 @@
+"""
+Compares the article extraction engine with the previous html.parser + find_all('p')
+extraction on a corpus of saved HTML pages.
+
+Run from the repository root with a directory of pages saved from news sites:
+
+    python -m benchmarks.html_extraction_benchmark path/to/pages --repetitions 5
+
+Reports pages per second, peak traced memory per page and the extracted body size.
+"""
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from app.utils.webscrapping.html_extractor import MAX_BYTES, extract_article
+
+
+def legacy_extract(html: bytes) -> dict:
+    """
+    The extraction done by SerpApiWebScraper.extract_news_content before the engine.
+    """
+    soup = BeautifulSoup(html.decode("utf-8", errors="replace"), 'html.parser')
+    header = soup.find('h1')
+    body = soup.find_all('p')
+    header_text = header.get_text(strip=True) if header else "No title found"
+    body_text = "\n".join(p.get_text(strip=True) for p in body if p.get_text(strip=True))
+    return {"header": header_text, "body": body_text}
+
+
+def engine_extract(html: bytes) -> dict:
+    # The engine never parses more than the streaming download keeps
+    return extract_article(html[:MAX_BYTES])
+
+
+def load_pages(directory: str) -> list:
+    paths = sorted(glob.glob(os.path.join(directory, "**", "*.htm*"), recursive=True))
+    pages = []
+    for path in paths:
+        with open(path, "rb") as page:
+            pages.append((path, page.read()))
+    return pages
+
+
+def benchmark(name: str, extract, pages: list, repetitions: int):
+    # Warm up imports and parser caches before timing
+    extract(pages[0][1])
+
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for _, html in pages:
+            extract(html)
+    elapsed = time.perf_counter() - start
+
+    peak_memory, body_bytes = 0, 0
+    for _, html in pages:
+        tracemalloc.start()
+        content = extract(html)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_memory = max(peak_memory, peak)
+        body_bytes += len(content["body"].encode("utf-8"))
+
+    print(f"{name}")
+    print(f"  pages/s:          {len(pages) * repetitions / elapsed:.1f}")
+    print(f"  peak memory/page: {peak_memory / 1024 / 1024:.2f} MiB")
+    print(f"  extracted body:   {body_bytes / len(pages) / 1024:.1f} KiB/page")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Directory with saved .html pages")
+    parser.add_argument("--repetitions", type=int, default=3, help="Passes over the corpus for the throughput")
+    args = parser.parse_args()
+
+    pages = load_pages(args.directory)
+    if not pages:
+        raise SystemExit(f"No .html pages found in {args.directory}")
+
+    total_size = sum(len(html) for _, html in pages)
+    print(f"{len(pages)} pages, {total_size / len(pages) / 1024:.1f} KiB/page on average\n")
+    benchmark("Previous extraction (html.parser, every <p>)", legacy_extract, pages, args.repetitions)
+    benchmark("Extraction engine (lxml, main article container)", engine_extract, pages, args.repetitions)
@@ -0,0 +1,109 @@
+"""
+Compares the offline language detector with the Groq round trip it replaces.
+
+Run from the repository root:
+
+    python -m benchmarks.language_detection_benchmark
+
+The Groq baseline is only measured when GROQ_API_KEY is set.
+"""
+import asyncio
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+from app.utils.language_detection import detect_language
+
+SAMPLES = [
+    ("EN", "Latest news about the presidential elections in the United States"),
+    ("EN", "What happened with the Federal Reserve interest rate decision this week"),
+    ("EN", "Apple announces new iPhone with satellite messaging"),
+    ("EN", "Wildfires spreading across California force thousands to evacuate"),
+    ("EN", "I want a post about the climate summit and its outcome for developing countries"),
+    ("ES", "Últimas noticias sobre las elecciones presidenciales en Perú"),
+    ("ES", "Qué pasó con la inflación en Argentina este mes"),
+    ("ES", "Quiero un meme sobre la final de la Copa Libertadores"),
+    ("ES", "La selección peruana anuncia su convocatoria para las eliminatorias"),
+    ("ES", "Crisis política en el Congreso tras la votación de la vacancia"),
+    ("PT", "Notícias sobre a economia do Brasil após a reforma tributária"),
+    ("PT", "O que aconteceu com as eleições municipais em São Paulo"),
+    ("PT", "Chuvas fortes no Rio Grande do Sul deixam milhares de desabrigados"),
+    ("FR", "Les dernières nouvelles sur la guerre en Ukraine"),
+    ("FR", "Que s'est-il passé avec la réforme des retraites en France"),
+    ("FR", "Le gouvernement annonce de nouvelles mesures pour le pouvoir d'achat"),
+    ("DE", "Neue Nachrichten über die Wirtschaft in Deutschland"),
+    ("DE", "Was ist mit der Bundestagswahl passiert und wer hat gewonnen"),
+    ("DE", "Die Regierung plant eine Reform der Schuldenbremse"),
+    ("IT", "Le ultime notizie sulla politica italiana"),
+    ("IT", "Cosa è successo con la legge di bilancio del governo"),
+    ("IT", "La nazionale italiana vince la partita contro la Spagna"),
+    ("NL", "Het laatste nieuws over de verkiezingen in Nederland"),
+    ("NL", "Wat is er gebeurd met de stikstofregels van het kabinet"),
+    ("JA", "東京の天気について最新のニュースを教えて"),
+    ("JA", "日本銀行の金利政策についての記事"),
+    ("ZH", "中国经济最新消息"),
+    ("ZH", "美国大选的最新新闻"),
+    ("KO", "한국 경제 뉴스를 알려주세요"),
+    ("AR", "أخبار الاقتصاد في مصر اليوم"),
+    ("RU", "Новости экономики России за неделю"),
+    ("EN", "Elon Musk Tesla"),
+    ("ES", "inflación Perú"),
+]
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+
+def _report(name, results, latencies):
+    correct = sum(1 for expected, detected in results if expected == detected)
+    print(f"{name}")
+    print(f"  accuracy: {correct}/{len(results)} ({correct / len(results):.1%})")
+    print(f"  latency:  mean {statistics.mean(latencies) * 1000:.3f} ms, "
+          f"p95 {_percentile(latencies, 0.95) * 1000:.3f} ms")
+
+
+def benchmark_offline(min_confidence: float, repetitions: int = 200):
+    results, latencies, fallbacks = [], [], 0
+    for expected, text in SAMPLES:
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            detected, confidence = detect_language(text)
+        latencies.append((time.perf_counter() - start) / repetitions)
+        results.append((expected, detected))
+        if confidence < min_confidence:
+            fallbacks += 1
+            print(f"  low confidence ({confidence}) -> Groq fallback: {text!r} detected as {detected}")
+
+    _report("Offline detector", results, latencies)
+    print(f"  Groq fallbacks at confidence < {min_confidence}: {fallbacks}/{len(SAMPLES)}")
+
+
+async def benchmark_groq():
+    from groq import AsyncGroq
+    from app.utils.groq import GroqClient
+
+    client = GroqClient(client=AsyncGroq(api_key=os.getenv("GROQ_API_KEY")))
+    # Force every sample through the Groq round trip, as before the offline detector
+    client.LANG_DETECT_MIN_CONFIDENCE = float("inf")
+
+    results, latencies = [], []
+    for expected, text in SAMPLES:
+        start = time.perf_counter()
+        detected = await client.detect_language(text)
+        latencies.append(time.perf_counter() - start)
+        results.append((expected, detected))
+
+    _report("Groq llama3-8b-8192 (previous behavior)", results, latencies)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    benchmark_offline(float(os.getenv("LANG_DETECT_MIN_CONFIDENCE", 0.5)))
+    if os.getenv("GROQ_API_KEY"):
+        asyncio.run(benchmark_groq())
+    else:
+        print("GROQ_API_KEY is not set, skipping the Groq baseline.")